@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SESSIONS = (100, 500)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kib(pid: int) -> int:
+    # Linux only: resident set size of the server process
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout:.0f}s")
+
+
+@contextmanager
+def _spawn(args: list[str], port: int, env: Optional[dict] = None) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(port, process)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            # uvicorn waits for SSE streams it has not noticed are closed
+            process.kill()
+            process.wait()
+
+
+async def _open_session(client: httpx.AsyncClient, url: str, ready: asyncio.Event) -> None:
+    async with client.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                # The endpoint event: the session exists on the server
+                ready.set()
+        # The stream ends only when the server goes away
+
+
+async def measure(server_pid: int, url: str, sessions: int, settle: float) -> dict:
+    """Open `sessions` idle SSE sessions and report the growth of the server's memory."""
+    before = _rss_kib(server_pid)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as client:
+        events = [asyncio.Event() for _ in range(sessions)]
+        tasks = [asyncio.create_task(_open_session(client, url, event)) for event in events]
+        await asyncio.wait_for(asyncio.gather(*(event.wait() for event in events)), 60)
+        await asyncio.sleep(settle)
+        after = _rss_kib(server_pid)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "sessions": sessions,
+        "rss_before_kib": before,
+        "rss_after_kib": after,
+        "per_session_kib": round((after - before) / sessions, 1),
+    }
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure the memory each idle SSE session costs the server"
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SESSIONS),
+        help="Numbers of concurrent idle sessions to open, each against a fresh server",
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=2.0,
+        help="Time to wait after the last session opened before reading the memory",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _parse_args(argv)
+    platform_port = _free_port()
+    with _spawn(["benchmarks/fake_platform.py", "--port", str(platform_port)], platform_port):
+        for sessions in args.sessions:
+            server_port = _free_port()
+            env = {
+                # The connectors package is imported from the repository root
+                "PYTHONPATH": str(ROOT),
+                "UNSTRUCTURED_API_KEY": os.environ.get("UNSTRUCTURED_API_KEY", "benchmark"),
+                "UNSTRUCTURED_API_URL": f"http://127.0.0.1:{platform_port}",
+            }
+            server_args = ["uns_mcp/server.py", "--host", "127.0.0.1", "--port", str(server_port)]
+            with _spawn(server_args, server_port, env) as server:
+                result = asyncio.run(
+                    measure(
+                        server.pid,
+                        f"http://127.0.0.1:{server_port}/sse",
+                        sessions,
+                        args.settle_seconds,
+                    )
+                )
+            print(
+                f"{result['sessions']:>6} sessions  RSS {result['rss_before_kib'] / 1024:.1f} MiB"
+                f" -> {result['rss_after_kib'] / 1024:.1f} MiB"
+                f"  {result['per_session_kib']:.1f} KiB per session"
+            )
+
+
+if __name__ == "__main__":
+    main()
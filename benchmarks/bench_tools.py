@@ -0,0 +1,426 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+# The server modules import each other by their flat names, like when run from uns_mcp/
+sys.path[:0] = [str(ROOT), str(ROOT / "uns_mcp")]
+os.environ.setdefault("UNSTRUCTURED_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLEDRIVE_SERVICE_ACCOUNT_KEY", "benchmark")
+os.environ.setdefault("MONGO_DB_CONNECTION_STRING", "mongodb://localhost:27017")
+
+import server  # noqa: E402
+from api_client import create_client  # noqa: E402
+from cache import TTLCache  # noqa: E402
+from invoice_extraction import extract_invoice_fields  # noqa: E402
+from invoice_mirror import InvoiceMirror  # noqa: E402
+from job_tracker import JobTracker  # noqa: E402
+from mcp.server.lowlevel.server import request_ctx  # noqa: E402
+from mcp.shared.context import RequestContext  # noqa: E402
+from mongo_pool import MongoPool, MongoSettings  # noqa: E402
+from subscriptions import ResourceSubscriptions  # noqa: E402
+
+from fake_platform import FakePlatform, FakePlatformSettings, create_app  # noqa: E402
+
+DEFAULT_SIZES = (10, 1000, 100000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+FAKE_PLATFORM_URL = "http://fake-platform"
+
+VENDORS = ("Acme Design", "Brightlight Utilities", "Northwind Cloud", "Globex Legal", "Initech IT")
+SERVICES = ("design", "hosting", "legal", "consulting", "maintenance")
+
+
+@dataclass
+class Fixture:
+    """Everything a benchmark case needs to build its arguments."""
+
+    size: int
+    platform: FakePlatform
+    app: server.AppContext
+
+    def first(self, items: dict) -> str:
+        return next(iter(items))
+
+    def some(self, items: dict, count: int = 10) -> list[str]:
+        return list(items)[:count]
+
+    def fresh_workflow(self) -> str:
+        workflow_id = f"bench-{time.perf_counter_ns()}"
+        self.platform.workflows[workflow_id] = self.platform.workflow_info(
+            workflow_id, {"name": "bench", "workflow_type": "basic"}
+        )
+        return workflow_id
+
+    def fresh_connector(self, items: dict) -> str:
+        item_id = f"bench-{time.perf_counter_ns()}"
+        items[item_id] = {**items[self.first(items)], "id": item_id}
+        return item_id
+
+    def fresh_job(self) -> str:
+        job = self.platform.new_job(self.platform.workflows[self.first(self.platform.workflows)])
+        # Keep the job SCHEDULED so it can be canceled
+        job.started = float("inf")
+        return job.info["id"]
+
+
+@dataclass
+class Case:
+    """One tool call or resource read with the arguments built for each call."""
+
+    name: str
+    call: Callable[[Fixture], Awaitable[Any]]
+    needs_mongo: bool = False
+
+
+def tool(name: str, args: Callable[[Fixture], dict] = lambda f: {}, **kwargs) -> Case:
+    async def call(fixture: Fixture) -> Any:
+        return await server.mcp.call_tool(name, args(fixture))
+
+    return Case(name=name, call=call, **kwargs)
+
+
+def tool_variant(label: str, name: str, args: Callable[[Fixture], dict], **kwargs) -> Case:
+    case = tool(name, args, **kwargs)
+    case.name = f"{name}[{label}]"
+    return case
+
+
+def resource(uri: str) -> Case:
+    async def call(fixture: Fixture) -> Any:
+        return await server.mcp.read_resource(uri)
+
+    return Case(name=uri, call=call, needs_mongo=True)
+
+
+def workflow_config(fixture: Fixture) -> dict:
+    return {
+        "name": "bench",
+        "workflow_type": "basic",
+        "source_id": fixture.first(fixture.platform.sources),
+        "destination_id": fixture.first(fixture.platform.destinations),
+        "schedule": "weekly",
+    }
+
+
+# Arguments of every registered tool; a tool missing here is reported when the suite runs
+CASES = [
+    tool("list_sources"),
+    tool_variant("page", "list_sources", lambda f: {"limit": 20, "offset": 20}),
+    tool("get_source_info", lambda f: {"source_id": f.first(f.platform.sources)}),
+    tool("get_sources_info", lambda f: {"source_ids": f.some(f.platform.sources)}),
+    tool("list_destinations"),
+    tool("get_destination_info", lambda f: {"destination_id": f.first(f.platform.destinations)}),
+    tool("get_destinations_info", lambda f: {"destination_ids": f.some(f.platform.destinations)}),
+    tool("list_workflows"),
+    tool_variant("page", "list_workflows", lambda f: {"limit": 20, "offset": 20}),
+    tool("get_workflow_info", lambda f: {"workflow_id": f.first(f.platform.workflows)}),
+    tool("get_workflows_info", lambda f: {"workflow_ids": f.some(f.platform.workflows)}),
+    tool("create_workflow", lambda f: {"workflow_config": workflow_config(f)}),
+    tool(
+        "update_workflow",
+        lambda f: {
+            "workflow_id": f.first(f.platform.workflows),
+            "workflow_config": workflow_config(f),
+        },
+    ),
+    tool("delete_workflow", lambda f: {"workflow_id": f.fresh_workflow()}),
+    tool("run_workflow", lambda f: {"workflow_id": f.first(f.platform.workflows)}),
+    tool("run_workflows", lambda f: {"workflow_ids": f.some(f.platform.workflows)}),
+    tool("list_jobs"),
+    tool_variant("refresh", "list_jobs", lambda f: {"refresh": True}),
+    tool_variant("top", "list_jobs", lambda f: {"limit": 20}),
+    tool("get_job_info", lambda f: {"job_id": f.first(f.platform.jobs)}),
+    tool_variant(
+        "full", "get_job_info", lambda f: {"job_id": f.first(f.platform.jobs), "projection": "full"}
+    ),
+    tool("wait_for_jobs", lambda f: {"job_ids": f.some(f.platform.jobs)}),
+    tool("cancel_job", lambda f: {"job_id": f.fresh_job()}),
+    tool("create_gdrive_source", lambda f: {"name": "bench", "drive_id": "drive"}),
+    tool(
+        "update_gdrive_source",
+        lambda f: {"source_id": f.first(f.platform.sources), "recursive": False},
+    ),
+    tool("delete_gdrive_source", lambda f: {"source_id": f.fresh_connector(f.platform.sources)}),
+    tool(
+        "create_mongodb_destination",
+        lambda f: {"name": "bench", "database": "invoices", "collection": "bench"},
+    ),
+    tool(
+        "update_mongodb_destination",
+        lambda f: {"destination_id": f.first(f.platform.destinations), "collection": "bench"},
+    ),
+    tool(
+        "delete_mongodb_destination",
+        lambda f: {"destination_id": f.fresh_connector(f.platform.destinations)},
+    ),
+    tool("get_vendor_bills_page", lambda f: {"page_size": 100}, needs_mongo=True),
+    tool("sync_invoice_mirror", needs_mongo=True),
+    tool("extract_invoices", needs_mongo=True),
+    tool(
+        "search_vendor_bills",
+        lambda f: {"service": "design", "year_from": 2024},
+        needs_mongo=True,
+    ),
+    tool_variant(
+        "budget", "search_vendor_bills", lambda f: {"service": "design", "max_tokens": 2000},
+        needs_mongo=True,
+    ),
+    resource("invoices://vendor"),
+    resource("invoices://vendor/totals"),
+    resource("invoices://vendor/year"),
+    resource("invoices://vendor/service"),
+]
+
+
+def invoice_chunks(count: int) -> list[dict]:
+    chunks = []
+    for i in range(count):
+        text = (
+            f"Invoice #INV-{i:06d} from {VENDORS[i % len(VENDORS)]} for "
+            f"{SERVICES[i % len(SERVICES)]} services dated {2022 + i % 3}-0{1 + i % 9}-1{i % 10}. "
+            f"Total: ${100 + (i * 37) % 9000:,}.{i % 100:02d}"
+        )
+        chunks.append({"text": text})
+    return chunks
+
+
+def mongo_client():
+    """Return a MongoDB client for the invoice cases, or None to skip them.
+
+    MONGO_DB_BENCHMARK_URI selects a real deployment, otherwise mongomock is used when it is
+    installed. Neither supports Atlas $search, so the invoice cases run on the local mirror.
+    """
+    uri = os.getenv("MONGO_DB_BENCHMARK_URI")
+    if uri:
+        from pymongo import MongoClient
+
+        return MongoClient(uri)
+    try:
+        import mongomock
+    except ImportError:
+        return None
+    return mongomock.MongoClient()
+
+
+async def build_fixture(size: int, tmp_dir: Path) -> Fixture:
+    platform = FakePlatform(FakePlatformSettings(job_step_seconds=0, seed=size))
+    platform.seed(sources=size, destinations=size, workflows=size, jobs=size)
+    client = create_client(
+        "benchmark",
+        server_url=FAKE_PLATFORM_URL,
+        async_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(platform))),
+    )
+
+    mongo = mirror = None
+    mongo_client_ = mongo_client()
+    if mongo_client_ is not None:
+        settings = MongoSettings(
+            connection_string="",
+            database="benchmarks",
+            collection=f"invoices_{size}",
+        )
+        mongo = MongoPool(settings, client=mongo_client_)
+        mongo.collection.drop()
+        mongo.invoices.drop()
+        for start in range(0, size, 10000):
+            chunks = invoice_chunks(min(10000, size - start))
+            mongo.collection.insert_many(chunks)
+            mongo.invoices.insert_many(
+                [{"_id": chunk["_id"], **extract_invoice_fields(chunk["text"])} for chunk in chunks]
+            )
+        mirror = InvoiceMirror(str(tmp_dir / f"mirror_{size}.db"), sync_interval=0)
+        mirror.sync(mongo.collection)
+
+    # Caches are disabled so that every call measures the full path
+    app = server.AppContext(
+        client=client,
+        listing_cache=TTLCache(ttl=0, maxsize=1),
+        invoice_cache=TTLCache(ttl=0, maxsize=1),
+        jobs=JobTracker(client),
+        subscriptions=ResourceSubscriptions(),
+        mongo=mongo,
+        mirror=mirror,
+    )
+    request_ctx.set(RequestContext(request_id=0, meta=None, session=None, lifespan_context=app))
+    return Fixture(size=size, platform=platform, app=app)
+
+
+async def close_fixture(fixture: Fixture) -> None:
+    await fixture.app.client.sdk_configuration.async_client.aclose()
+    if fixture.app.mirror is not None:
+        fixture.app.mirror.close()
+    if fixture.app.mongo is not None:
+        fixture.app.mongo.collection.drop()
+        fixture.app.mongo.invoices.drop()
+        fixture.app.mongo.close()
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[max(0, math.ceil(percent / 100 * len(samples)) - 1)]
+
+
+def reported_error(result: Any) -> Optional[str]:
+    """The error a tool or resource returned as its result instead of raising, if any."""
+    for item in result:
+        text = getattr(item, "text", None) or getattr(item, "content", None)
+        if not isinstance(text, str):
+            continue
+        if text.startswith("Error"):
+            return text
+        try:
+            value = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and "error" in value:
+            return str(value["error"])
+    return None
+
+
+async def measure(case: Case, fixture: Fixture, iterations: int, max_seconds: float) -> dict:
+    # Warms up caches of the interpreter, pydantic and SQLite; a failing case is not timed
+    error = reported_error(await case.call(fixture))
+    if error:
+        return {"error": error}
+
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < iterations and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        await case.call(fixture)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    # Allocations are measured on a separate call, tracing slows every allocation down
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    await case.call(fixture)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "peak_alloc_kib": round((peak - before) / 1024, 1),
+    }
+
+
+def machine() -> dict:
+    """Describe where the results were measured, they only compare on the same setup."""
+    uri = os.getenv("MONGO_DB_BENCHMARK_URI")
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "mongodb": "MONGO_DB_BENCHMARK_URI" if uri else "mongomock",
+    }
+
+
+def missing_tools() -> list[str]:
+    covered = {case.name.split("[")[0] for case in CASES}
+    return sorted(t.name for t in server.mcp._tool_manager.list_tools() if t.name not in covered)
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"\n{'case':<52} {'p50 ms':>10} {'baseline':>10} {'change':>8}")
+    for size, cases in results.items():
+        for name, result in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous or "p50_ms" not in result or "p50_ms" not in previous:
+                continue
+            change = (result["p50_ms"] - previous["p50_ms"]) / max(previous["p50_ms"], 1e-9)
+            print(
+                f"{name + ' @' + size:<52} {result['p50_ms']:>10.3f} "
+                f"{previous['p50_ms']:>10.3f} {change:>+8.0%}"
+            )
+
+
+async def run(args: argparse.Namespace, tmp_dir: Path) -> dict:
+    cases = [case for case in CASES if not args.only or case.name.split("[")[0] in args.only]
+    results: dict[str, dict] = {}
+    for size in args.sizes:
+        print(f"\n== {size} items", flush=True)
+        fixture = await build_fixture(size, tmp_dir)
+        results[str(size)] = {}
+        try:
+            for case in cases:
+                if case.needs_mongo and fixture.app.mongo is None:
+                    result = {"skipped": "no MongoDB stand-in, install mongomock"}
+                else:
+                    try:
+                        result = await measure(case, fixture, args.iterations, args.max_seconds)
+                    except Exception as e:
+                        result = {"error": f"{type(e).__name__}: {e}"}
+                results[str(size)][case.name] = result
+                summary = (
+                    f"p50 {result['p50_ms']:.3f} ms  p95 {result['p95_ms']:.3f} ms  "
+                    f"p99 {result['p99_ms']:.3f} ms  peak {result['peak_alloc_kib']} KiB"
+                    if "p50_ms" in result
+                    else next(iter(result.values()))
+                )
+                print(f"  {case.name:<45} {summary}", flush=True)
+        finally:
+            await close_fixture(fixture)
+    return results
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure the latency and allocations of every MCP tool and resource"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Number of sources, destinations, workflows, jobs and invoice chunks per run",
+    )
+    parser.add_argument("--iterations", type=int, default=30, help="Timed calls per case")
+    parser.add_argument(
+        "--max-seconds", type=float, default=5.0,
+        help="Stop timing a case after this long, once it has at least 3 samples",
+    )
+    parser.add_argument("--only", nargs="+", help="Only run these tools or resource URIs")
+    parser.add_argument(
+        "--output", default=str(DEFAULT_BASELINE), help="Where to write the results as JSON"
+    )
+    parser.add_argument("--compare", help="Baseline JSON file to compare the results against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _parse_args(argv)
+    # Request logging of httpx and the server would dominate the measurements
+    logging.disable(logging.INFO)
+
+    missing = missing_tools()
+    if missing:
+        print(f"No benchmark case for: {', '.join(missing)}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="uns-mcp-bench-") as tmp_dir:
+        results = asyncio.run(run(args, Path(tmp_dir)))
+
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+    if args.output:
+        output = {"machine": machine(), **results}
+        Path(args.output).write_text(json.dumps(output, indent=2, sort_keys=True) + "\n")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+API_PREFIX = "/api/v1"
+
+SCHEDULE_CRONTABS = {
+    "every 15 minutes": "*/15 * * * *",
+    "every hour": "0 * * * *",
+    "every 2 hours": "0 */2 * * *",
+    "every 4 hours": "0 */4 * * *",
+    "every 6 hours": "0 */6 * * *",
+    "every 8 hours": "0 */8 * * *",
+    "every 10 hours": "0 */10 * * *",
+    "every 12 hours": "0 */12 * * *",
+    "daily": "0 0 * * *",
+    "weekly": "0 0 * * 0",
+    "monthly": "0 0 1 * *",
+}
+
+
+@dataclass
+class FakePlatformSettings:
+    """Behaviour of the fake Unstructured Platform API.
+
+    Settings are read on every request, so a benchmark can change them on a running server.
+    """
+
+    # Fixed delay added to every API call, plus a uniform random jitter on top of it
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Fraction of API calls answered with error_status instead of being served. The server
+    # retries only GETs on 429 and 502-504, with a jittered backoff; POST, PATCH and DELETE
+    # calls fail on the first error. 5xx responses also count towards the circuit breakers
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Time a new job spends SCHEDULED and then IN_PROGRESS before it finishes
+    job_step_seconds: float = 2.0
+    # Fraction of new jobs that end FAILED instead of COMPLETED
+    job_failure_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class _Job:
+    info: dict
+    started: float
+    fails: bool
+    stopped: bool = False
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _isoformat(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+class FakePlatform:
+    """In-memory sources, destinations, workflows and jobs served like the Platform API.
+
+    Jobs move from SCHEDULED to IN_PROGRESS to COMPLETED (or FAILED) as time passes, one
+    `job_step_seconds` per state, and can be canceled while they are not finished.
+    """
+
+    def __init__(self, settings: Optional[FakePlatformSettings] = None):
+        self.settings = settings or FakePlatformSettings()
+        self.random = random.Random(self.settings.seed)
+        self.sources: dict[str, dict] = {}
+        self.destinations: dict[str, dict] = {}
+        self.workflows: dict[str, dict] = {}
+        self.jobs: dict[str, _Job] = {}
+        self.requests = 0
+
+    def seed(
+        self, sources: int = 0, destinations: int = 0, workflows: int = 0, jobs: int = 0
+    ) -> None:
+        """Fill the platform with generated items; seeded jobs have already finished."""
+        start = _now() - timedelta(days=30)
+
+        def created_at(i: int, count: int) -> str:
+            return _isoformat(start + timedelta(seconds=30 * 24 * 3600 * i / max(count, 1)))
+
+        for i in range(sources):
+            source_id = _new_id()
+            self.sources[source_id] = {
+                "id": source_id,
+                "name": f"source-{i}",
+                "type": "google_drive",
+                "created_at": created_at(i, sources),
+                "updated_at": None,
+                "config": {
+                    "drive_id": f"drive-{i}",
+                    "recursive": True,
+                    "service_account_key": "**********",
+                    "extensions": [".pdf"],
+                },
+            }
+        for i in range(destinations):
+            destination_id = _new_id()
+            self.destinations[destination_id] = {
+                "id": destination_id,
+                "name": f"destination-{i}",
+                "type": "mongodb",
+                "created_at": created_at(i, destinations),
+                "updated_at": None,
+                "config": {
+                    "database": "invoices",
+                    "collection": f"collection-{i}",
+                    "uri": "**********",
+                },
+            }
+
+        source_ids = list(self.sources)
+        destination_ids = list(self.destinations)
+        for i in range(workflows):
+            workflow_id = _new_id()
+            self.workflows[workflow_id] = self.workflow_info(
+                workflow_id,
+                {
+                    "name": f"workflow-{i}",
+                    "workflow_type": "basic",
+                    "source_id": self.random.choice(source_ids) if source_ids else None,
+                    "destination_id": (
+                        self.random.choice(destination_ids) if destination_ids else None
+                    ),
+                    "schedule": "daily" if i % 3 == 0 else None,
+                },
+                created_at=created_at(i, workflows),
+            )
+
+        workflow_ids = list(self.workflows)
+        for i in range(jobs if workflow_ids else 0):
+            workflow = self.workflows[self.random.choice(workflow_ids)]
+            job = self.new_job(workflow, created_at=created_at(i, jobs))
+            job.started = float("-inf")
+            job.fails = self.random.random() < 0.1
+            job.stopped = self.random.random() < 0.05
+
+    def workflow_info(self, workflow_id: str, body: dict, created_at: Optional[str] = None) -> dict:
+        schedule = body.get("schedule")
+        return {
+            "id": workflow_id,
+            "name": body["name"],
+            "workflow_type": body.get("workflow_type"),
+            "sources": [body["source_id"]] if body.get("source_id") else [],
+            "destinations": [body["destination_id"]] if body.get("destination_id") else [],
+            "workflow_nodes": [
+                {**node, "id": node.get("id") or _new_id()}
+                for node in body.get("workflow_nodes") or []
+            ],
+            "schedule": (
+                {"crontab_entries": [{"cron_expression": SCHEDULE_CRONTABS[schedule]}]}
+                if schedule in SCHEDULE_CRONTABS
+                else None
+            ),
+            "reprocess_all": body.get("reprocess_all") or False,
+            "status": "active",
+            "created_at": created_at or _isoformat(_now()),
+            "updated_at": None,
+        }
+
+    def new_job(self, workflow: dict, created_at: Optional[str] = None) -> _Job:
+        job_id = _new_id()
+        info = {
+            "id": job_id,
+            "workflow_id": workflow["id"],
+            "workflow_name": workflow["name"],
+            "created_at": created_at or _isoformat(_now()),
+            "input_file_ids": None,
+            "output_node_files": None,
+        }
+        job = _Job(
+            info=info,
+            started=time.monotonic(),
+            fails=self.random.random() < self.settings.job_failure_rate,
+        )
+        self.jobs[job_id] = job
+        return job
+
+    def job_info(self, job: _Job) -> dict:
+        """Return the job as the API reports it now."""
+        step = self.settings.job_step_seconds
+        elapsed = time.monotonic() - job.started
+        if job.stopped:
+            status = "STOPPED"
+        elif elapsed < step:
+            status = "SCHEDULED"
+        elif elapsed < 2 * step:
+            status = "IN_PROGRESS"
+        else:
+            status = "FAILED" if job.fails else "COMPLETED"
+        runtime = f"PT{2 * step:g}S" if status in ("COMPLETED", "FAILED") else None
+        return {**job.info, "status": status, "runtime": runtime}
+
+    # Request handling
+
+    async def inject(self) -> Optional[Response]:
+        """Apply the configured latency and return an error response for failed calls."""
+        self.requests += 1
+        settings = self.settings
+        delay = settings.latency_ms + self.random.uniform(0, settings.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if settings.error_rate > 0 and self.random.random() < settings.error_rate:
+            return JSONResponse(
+                {"detail": "Injected failure from the fake platform"},
+                status_code=settings.error_status,
+            )
+        return None
+
+
+def _not_found(kind: str, item_id: str) -> JSONResponse:
+    return JSONResponse({"detail": f"{kind} {item_id} not found"}, status_code=404)
+
+
+def _missing_fields(body: dict, *names: str) -> Optional[JSONResponse]:
+    missing = [name for name in names if body.get(name) in (None, "")]
+    if not missing:
+        return None
+    return JSONResponse(
+        {
+            "detail": [
+                {"loc": ["body", name], "msg": "Field required", "type": "missing"}
+                for name in missing
+            ]
+        },
+        status_code=422,
+    )
+
+
+def _connector_routes(platform: FakePlatform, kind: str, items: dict[str, dict]) -> list[Route]:
+    """Routes for /sources or /destinations, which only differ in their type query parameter."""
+    type_param = f"{kind}_type"
+    label = kind.capitalize()
+
+    async def list_items(request: Request) -> Response:
+        connector_type = request.query_params.get(type_param)
+        results = [
+            item
+            for item in items.values()
+            if connector_type is None or item["type"] == connector_type
+        ]
+        return JSONResponse(results)
+
+    async def create_item(request: Request) -> Response:
+        body = await request.json()
+        error = _missing_fields(body, "name", "type", "config")
+        if error:
+            return error
+        item_id = _new_id()
+        items[item_id] = {
+            "id": item_id,
+            "name": body["name"],
+            "type": body["type"],
+            "config": body["config"],
+            "created_at": _isoformat(_now()),
+            "updated_at": None,
+        }
+        return JSONResponse(items[item_id])
+
+    async def get_item(request: Request) -> Response:
+        item_id = request.path_params["item_id"]
+        if item_id not in items:
+            return _not_found(label, item_id)
+        return JSONResponse(items[item_id])
+
+    async def update_item(request: Request) -> Response:
+        item_id = request.path_params["item_id"]
+        if item_id not in items:
+            return _not_found(label, item_id)
+        body = await request.json()
+        error = _missing_fields(body, "config")
+        if error:
+            return error
+        items[item_id] = {
+            **items[item_id],
+            "config": body["config"],
+            "updated_at": _isoformat(_now()),
+        }
+        return JSONResponse(items[item_id])
+
+    async def delete_item(request: Request) -> Response:
+        item_id = request.path_params["item_id"]
+        if items.pop(item_id, None) is None:
+            return _not_found(label, item_id)
+        return JSONResponse({"detail": f"{label} with id {item_id} successfully deleted."})
+
+    prefix = f"{API_PREFIX}/{kind}s"
+    return [
+        Route(f"{prefix}/", list_items, methods=["GET"]),
+        Route(f"{prefix}/", create_item, methods=["POST"]),
+        Route(prefix + "/{item_id}", get_item, methods=["GET"]),
+        Route(prefix + "/{item_id}", update_item, methods=["PUT"]),
+        Route(prefix + "/{item_id}", delete_item, methods=["DELETE"]),
+    ]
+
+
+def _workflow_routes(platform: FakePlatform) -> list[Route]:
+    workflows = platform.workflows
+
+    async def list_workflows(request: Request) -> Response:
+        params = request.query_params
+        results = [
+            workflow
+            for workflow in workflows.values()
+            if ("source_id" not in params or params["source_id"] in workflow["sources"])
+            and (
+                "destination_id" not in params
+                or params["destination_id"] in workflow["destinations"]
+            )
+            and ("status" not in params or params["status"] == workflow["status"])
+        ]
+        return JSONResponse(results)
+
+    async def create_workflow(request: Request) -> Response:
+        body = await request.json()
+        error = _missing_fields(body, "name", "workflow_type")
+        if error:
+            return error
+        workflow_id = _new_id()
+        workflows[workflow_id] = platform.workflow_info(workflow_id, body)
+        return JSONResponse(workflows[workflow_id])
+
+    async def get_workflow(request: Request) -> Response:
+        workflow_id = request.path_params["workflow_id"]
+        if workflow_id not in workflows:
+            return _not_found("Workflow", workflow_id)
+        return JSONResponse(workflows[workflow_id])
+
+    async def update_workflow(request: Request) -> Response:
+        workflow_id = request.path_params["workflow_id"]
+        if workflow_id not in workflows:
+            return _not_found("Workflow", workflow_id)
+        current = workflows[workflow_id]
+        body = await request.json()
+        merged = {
+            "name": current["name"],
+            "workflow_type": current["workflow_type"],
+            "source_id": current["sources"][0] if current["sources"] else None,
+            "destination_id": current["destinations"][0] if current["destinations"] else None,
+            "workflow_nodes": current["workflow_nodes"],
+            "reprocess_all": current["reprocess_all"],
+            **{key: value for key, value in body.items() if value is not None},
+        }
+        updated = platform.workflow_info(workflow_id, merged, created_at=current["created_at"])
+        if "schedule" not in body:
+            updated["schedule"] = current["schedule"]
+        updated["updated_at"] = _isoformat(_now())
+        workflows[workflow_id] = updated
+        return JSONResponse(updated)
+
+    async def delete_workflow(request: Request) -> Response:
+        workflow_id = request.path_params["workflow_id"]
+        if workflows.pop(workflow_id, None) is None:
+            return _not_found("Workflow", workflow_id)
+        return JSONResponse({"detail": f"Workflow with id {workflow_id} successfully deleted."})
+
+    async def run_workflow(request: Request) -> Response:
+        workflow_id = request.path_params["workflow_id"]
+        if workflow_id not in workflows:
+            return _not_found("Workflow", workflow_id)
+        job = platform.new_job(workflows[workflow_id])
+        return JSONResponse(platform.job_info(job), status_code=202)
+
+    prefix = f"{API_PREFIX}/workflows"
+    return [
+        Route(f"{prefix}/", list_workflows, methods=["GET"]),
+        Route(f"{prefix}/", create_workflow, methods=["POST"]),
+        Route(prefix + "/{workflow_id}", get_workflow, methods=["GET"]),
+        Route(prefix + "/{workflow_id}", update_workflow, methods=["PUT"]),
+        Route(prefix + "/{workflow_id}", delete_workflow, methods=["DELETE"]),
+        Route(prefix + "/{workflow_id}/run", run_workflow, methods=["POST"]),
+    ]
+
+
+def _job_routes(platform: FakePlatform) -> list[Route]:
+    jobs = platform.jobs
+
+    async def list_jobs(request: Request) -> Response:
+        workflow_id = request.query_params.get("workflow_id")
+        status = request.query_params.get("status")
+        results = []
+        for job in jobs.values():
+            if workflow_id is not None and job.info["workflow_id"] != workflow_id:
+                continue
+            info = platform.job_info(job)
+            if status is None or info["status"] == status:
+                results.append(info)
+        return JSONResponse(results)
+
+    async def get_job(request: Request) -> Response:
+        job_id = request.path_params["job_id"]
+        if job_id not in jobs:
+            return _not_found("Job", job_id)
+        return JSONResponse(platform.job_info(jobs[job_id]))
+
+    async def cancel_job(request: Request) -> Response:
+        job_id = request.path_params["job_id"]
+        if job_id not in jobs:
+            return _not_found("Job", job_id)
+        job = jobs[job_id]
+        if platform.job_info(job)["status"] not in ("COMPLETED", "FAILED"):
+            job.stopped = True
+        return JSONResponse({"id": job_id, "status": "cancelling", "message": "Job cancelled"})
+
+    prefix = f"{API_PREFIX}/jobs"
+    return [
+        Route(f"{prefix}/", list_jobs, methods=["GET"]),
+        Route(prefix + "/{job_id}", get_job, methods=["GET"]),
+        Route(prefix + "/{job_id}/cancel", cancel_job, methods=["POST"]),
+    ]
+
+
+def create_app(platform: FakePlatform) -> Starlette:
+    """Create the ASGI app serving the platform under /api/v1, like the real API."""
+    routes = (
+        _connector_routes(platform, "source", platform.sources)
+        + _connector_routes(platform, "destination", platform.destinations)
+        + _workflow_routes(platform)
+        + _job_routes(platform)
+    )
+
+    async def inject_faults(request: Request, call_next) -> Response:
+        if request.url.path.startswith(API_PREFIX):
+            error = await platform.inject()
+            if error is not None:
+                return error
+        return await call_next(request)
+
+    return Starlette(
+        routes=routes,
+        middleware=[Middleware(BaseHTTPMiddleware, dispatch=inject_faults)],
+    )
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a fake Unstructured Platform API")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed calls")
+    parser.add_argument("--error-status", type=int, default=503, help="Status of failed calls")
+    parser.add_argument(
+        "--job-step-seconds", type=float, default=2.0, help="Time a job spends in each state"
+    )
+    parser.add_argument(
+        "--job-failure-rate", type=float, default=0.0, help="Fraction of jobs that fail"
+    )
+    parser.add_argument("--sources", type=int, default=5, help="Number of seeded sources")
+    parser.add_argument("--destinations", type=int, default=5, help="Number of seeded destinations")
+    parser.add_argument("--workflows", type=int, default=10, help="Number of seeded workflows")
+    parser.add_argument("--jobs", type=int, default=50, help="Number of seeded finished jobs")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _parse_args(argv)
+    platform = FakePlatform(
+        FakePlatformSettings(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            job_step_seconds=args.job_step_seconds,
+            job_failure_rate=args.job_failure_rate,
+            seed=args.seed,
+        )
+    )
+    platform.seed(
+        sources=args.sources,
+        destinations=args.destinations,
+        workflows=args.workflows,
+        jobs=args.jobs,
+    )
+    print(f"Fake Unstructured API on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(platform), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,11 @@ from unstructured_client.models.shared import (
     UpdateDestinationConnector,
 )
 
+from metrics import record_failure
+
 from connectors.utils import (
     create_log_for_created_updated_connector,
+    invalidate_listing_cache,
 )
 
 
@@ -62,6 +65,7 @@ async def create_mongodb_destination(
         response = await client.destinations.create_destination_async(
             request=CreateDestinationRequest(create_destination_connector=destination_connector),
         )
+        invalidate_listing_cache(ctx)
 
         result = create_log_for_created_updated_connector(
             response,
@@ -71,6 +75,7 @@ async def create_mongodb_destination(
         )
         return result
     except Exception as e:
+        record_failure()
         return f"Error creating MongoDB destination connector: {str(e)}"
 
 
@@ -118,6 +123,7 @@ async def update_mongodb_destination(
         )
         current_config = get_response.destination_connector_information.config
     except Exception as e:
+        record_failure()
         return f"Error retrieving destination connector: {str(e)}"
 
     input_config = MongoDBConnectorConfigInput(**current_config.model_dump())
@@ -135,6 +141,7 @@ async def update_mongodb_destination(
                 update_destination_connector=destination_connector,
             ),
         )
+        invalidate_listing_cache(ctx)
 
         result = create_log_for_created_updated_connector(
             response,
@@ -144,6 +151,7 @@ async def update_mongodb_destination(
         )
         return result
     except Exception as e:
+        record_failure()
         return f"Error updating MongoDB destination connector: {str(e)}"
 
 
@@ -162,6 +170,8 @@ async def delete_mongodb_destination(ctx: Context, destination_id: str) -> str:
         _ = await client.destinations.delete_destination_async(
             request=DeleteDestinationRequest(destination_id=destination_id),
         )
+        invalidate_listing_cache(ctx)
         return f"MongoDB Destination Connector with ID {destination_id} deleted successfully"
     except Exception as e:
+        record_failure()
         return f"Error deleting MongoDB destination connector: {str(e)}"
\ No newline at end of file
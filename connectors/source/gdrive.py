@@ -17,8 +17,11 @@ from unstructured_client.models.shared import (
     UpdateSourceConnector,
 )
 
+from metrics import record_failure
+
 from connectors.utils import (
     create_log_for_created_updated_connector,
+    invalidate_listing_cache,
 )
 
 
@@ -62,6 +65,7 @@ async def create_gdrive_source(
         response = await client.sources.create_source_async(
             request=CreateSourceRequest(create_source_connector=source_connector),
         )
+        invalidate_listing_cache(ctx)
         result = create_log_for_created_updated_connector(
             response,
             connector_name="GoogleDrive",
@@ -70,6 +74,7 @@ async def create_gdrive_source(
         )
         return result
     except Exception as e:
+        record_failure()
         return f"Error creating gdrive source connector: {str(e)}"
 
 
@@ -122,6 +127,7 @@ async def update_gdrive_source(
         )
         current_config = get_response.source_connector_information.config
     except Exception as e:
+        record_failure()
         return f"Error retrieving source connector: {str(e)}"
 
     # Update configuration with new values
@@ -145,6 +151,7 @@ async def update_gdrive_source(
                 update_source_connector=source_connector,
             ),
         )
+        invalidate_listing_cache(ctx)
         result = create_log_for_created_updated_connector(
             response,
             connector_name="GoogleDrive",
@@ -153,6 +160,7 @@ async def update_gdrive_source(
         )
         return result
     except Exception as e:
+        record_failure()
         return f"Error updating gdrive source connector: {str(e)}"
 
 
@@ -171,6 +179,8 @@ async def delete_gdrive_source(ctx: Context, source_id: str) -> str:
         _ = await client.sources.delete_source_async(
             request=DeleteSourceRequest(source_id=source_id),
         )
+        invalidate_listing_cache(ctx)
         return f"gdrive Source Connector with ID {source_id} deleted successfully"
     except Exception as e:
+        record_failure()
         return f"Error deleting gdrive source connector: {str(e)}"
\ No newline at end of file
@@ -1,5 +1,14 @@
 from typing import Literal
 
+from mcp.server.fastmcp import Context
+
+
+def invalidate_listing_cache(ctx: Context) -> None:
+    """Drop cached list_* results after a connector or workflow has been changed."""
+    cache = getattr(ctx.request_context.lifespan_context, "listing_cache", None)
+    if cache is not None:
+        cache.clear()
+
 
 def create_log_for_created_updated_connector(
     response,
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+
+from invoice_extraction import extract_invoice_fields
+
+
+def amount(text: str):
+    value = extract_invoice_fields(text).get("amount")
+    return value.to_decimal() if value is not None else None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Total: $1,200.00", Decimal("1200.00")),
+        ("Total: €2.500,00", Decimal("2500.00")),
+        ("Total: 1 234,56 EUR", Decimal("1234.56")),
+        ("Total: 1 234,56", Decimal("1234.56")),
+        ("Total: CHF 1'234.50", Decimal("1234.50")),
+        ("Paid €1.234.567,89 by card", Decimal("1234567.89")),
+        ("Amount due: 12,5", Decimal("12.5")),
+        ("Grand total: USD 3,000", Decimal("3000")),
+        ("Total: $50. Thank you", Decimal("50")),
+        ("Total: $1,200.00.", Decimal("1200.00")),
+    ],
+)
+def test_amount_separators(text, expected):
+    assert amount(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Mixed up separators are left unset rather than read as a smaller amount
+        "Total: $1,234,56",
+        "Total: €2.500,005",
+    ],
+)
+def test_ambiguous_amount_is_left_unset(text):
+    assert amount(text) is None
+
+
+def test_largest_amount_without_total_label():
+    assert amount("Design €300,00 and hosting €1.200,50") == Decimal("1200.50")
+
+
+@pytest.mark.parametrize(
+    "text, currency",
+    [
+        ("Total: $10", "USD"),
+        ("Total: €10", "EUR"),
+        ("Total: £10", "GBP"),
+        ("Total: ₦45,000", "NGN"),
+        ("Total due: KES 1,500", "KES"),
+        ("Total: usd 10", "USD"),
+    ],
+)
+def test_currency(text, currency):
+    assert extract_invoice_fields(text)["currency"] == currency
+
+
+@pytest.mark.parametrize(
+    "text, vendor",
+    [
+        ("Invoice #INV-1001 from Acme Design LLC. Date: 2024-03-05", "Acme Design LLC"),
+        ("Bill from Northwind Cloud Date 2024-01-02", "Northwind Cloud"),
+        ("Services by Initech IT Invoice #77", "Initech IT"),
+        ("Vendor: Globex Corporation INVOICE NO 5", "Globex Corporation"),
+        ("Billed from A.B. Smith & Sons Ltd\nTotal: $5", "A.B. Smith & Sons Ltd"),
+        ("Invoice from Acme.io Inc. Thanks for your order.", "Acme.io Inc"),
+        ("Paid by USD transfer from Hooli Total: $5", "Hooli"),
+    ],
+)
+def test_vendor_stops_at_field_labels(text, vendor):
+    assert extract_invoice_fields(text)["vendor"] == vendor
+
+
+def test_parsed_needs_vendor_and_amount():
+    fields = extract_invoice_fields("Bill from Northwind Cloud\nInvoice No: NW-7\nTotal: €2.500,00")
+    assert fields["parsed"]
+    assert fields["vendor_key"] == "northwind cloud"
+    assert fields["invoice_number"] == "NW-7"
+    assert not extract_invoice_fields("Bill from Northwind Cloud")["parsed"]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from invoice_watch import InvoiceWatcher
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class StandalonePool:
+    """MongoPool stand-in for a standalone mongod, where change streams are unavailable."""
+
+    def __init__(self):
+        self.collection = mongomock.MongoClient().db.chunks
+
+        def watch(*args, **kwargs):
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+
+        self.collection.watch = watch
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+async def watch_while(mongo, changes, notify_on_start):
+    calls = []
+
+    async def on_change():
+        calls.append(mongo.collection.count_documents({}))
+
+    watcher = InvoiceWatcher(
+        mongo, on_change, poll_interval=0.05, notify_on_start=notify_on_start
+    )
+    watcher.start()
+    await asyncio.sleep(0.2)
+    for change in changes:
+        change()
+        await asyncio.sleep(0.2)
+    await watcher.stop()
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_notify_on_start_catches_up_once():
+    mongo = StandalonePool()
+    mongo.collection.insert_many([{"text": "a"}, {"text": "b"}])
+    assert await watch_while(mongo, [], notify_on_start=True) == [2]
+    assert await watch_while(mongo, [], notify_on_start=False) == []
+
+
+@pytest.mark.asyncio
+async def test_inserts_and_deletes_are_noticed_when_polling():
+    mongo = StandalonePool()
+    mongo.collection.insert_many([{"text": "a"}, {"text": "b"}])
+    changes = [
+        lambda: mongo.collection.insert_one({"text": "c"}),
+        lambda: mongo.collection.delete_one({"text": "a"}),
+        # Writes of other fields leave the fingerprint alone
+        lambda: mongo.collection.update_one({"text": "b"}, {"$set": {"seen": True}}),
+    ]
+    assert await watch_while(mongo, changes, notify_on_start=False) == [3, 2]
@@ -0,0 +1,26 @@
+from stateless_http import SqliteSessionStore
+
+
+def expires_at(store, session_id):
+    return store._conn.execute(
+        "SELECT expires_at FROM mcp_sessions WHERE id = ?", (session_id,)
+    ).fetchone()[0]
+
+
+def test_sqlite_session_expiry_is_extended_past_half_ttl(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("stateless_http.time.time", lambda: clock[0])
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), ttl=100)
+    store.put("s", {"session_id": "s"})
+
+    clock[0] += 40
+    assert store.get("s") == {"session_id": "s"}
+    assert expires_at(store, "s") == 1100
+
+    clock[0] += 20
+    assert store.get("s") == {"session_id": "s"}
+    assert expires_at(store, "s") == 1160
+
+    clock[0] += 160
+    assert store.get("s") is None
+    store.close()
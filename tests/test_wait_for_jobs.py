@@ -0,0 +1,61 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from unstructured_client.models.shared import JobStatus
+
+import server
+
+
+class FakeJobs:
+    """Jobs API that never finishes a job and counts the polls."""
+
+    def __init__(self):
+        self.polls = 0
+
+    async def get_job_async(self, request):
+        self.polls += 1
+        return SimpleNamespace(
+            job_information=SimpleNamespace(status=JobStatus.IN_PROGRESS, runtime=None)
+        )
+
+
+def make_context(jobs: FakeJobs) -> SimpleNamespace:
+    async def report_progress(progress, total):
+        pass
+
+    lifespan_context = SimpleNamespace(
+        client=SimpleNamespace(jobs=jobs),
+        jobs=SimpleNamespace(track=lambda job: None),
+    )
+    return SimpleNamespace(
+        request_context=SimpleNamespace(lifespan_context=lifespan_context),
+        report_progress=report_progress,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("interval", [0, -1])
+async def test_non_positive_poll_interval_is_clamped(interval):
+    jobs = FakeJobs()
+    start = time.monotonic()
+    result = await server.wait_for_jobs(
+        make_context(jobs),
+        ["job"],
+        timeout_seconds=1.2,
+        poll_interval_seconds=interval,
+        max_poll_interval_seconds=interval,
+    )
+    assert result.startswith("Timed out")
+    assert time.monotonic() - start >= 1.2
+    # One poll up front and one per 0.5 s floor, not a tight loop
+    assert jobs.polls <= 1 + 1.2 / server.MIN_JOB_POLL_INTERVAL_SECONDS + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("timeout", [0, -5])
+async def test_non_positive_timeout_is_rejected(timeout):
+    jobs = FakeJobs()
+    result = await server.wait_for_jobs(make_context(jobs), ["job"], timeout_seconds=timeout)
+    assert result.startswith("Invalid timeout_seconds")
+    assert jobs.polls == 0
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Hashable, Optional
+
+from mcp import types
+from mcp.server.fastmcp import FastMCP
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.exceptions import McpError
+
+from metrics import Counter, Gauge, Histogram
+from request_handlers import wrap_request_handlers
+from settings import env_float, env_int
+
+# JSON-RPC error code of calls turned away after waiting `max_wait` seconds for a slot
+SERVER_BUSY = -32000
+# Seconds; a wait is bounded by `max_wait`, which defaults to 10
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class AdmissionSettings:
+    max_sessions: int = 0
+    max_calls: int = 0
+    max_calls_per_session: int = 0
+    max_wait: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionSettings":
+        """Build the admission limits from environment variables; 0 means unlimited."""
+        return cls(
+            max_sessions=env_int("MCP_MAX_SESSIONS", cls.max_sessions),
+            max_calls=env_int("MCP_MAX_CONCURRENT_CALLS", cls.max_calls),
+            max_calls_per_session=env_int(
+                "MCP_MAX_CALLS_PER_SESSION", cls.max_calls_per_session
+            ),
+            max_wait=env_float("MCP_ADMISSION_WAIT_SECONDS", cls.max_wait),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        limits = (self.max_sessions, self.max_calls, self.max_calls_per_session)
+        return any(limit > 0 for limit in limits)
+
+
+class AdmissionController:
+    """Caps on open sessions and on tool calls and resource reads in flight.
+
+    A call over the global or per-session limit waits in a queue for up to `max_wait` seconds
+    and is then answered with a `SERVER_BUSY` error, so a noisy client cannot take every slot
+    and a burst degrades into quick errors instead of ever-growing latency. Sessions over the
+    limit are refused right away. Queue depth, wait times and rejections are exposed as
+    metrics to size the deployment.
+    """
+
+    def __init__(self, settings: AdmissionSettings):
+        self.settings = settings
+        self.sessions = 0
+        self.in_flight = 0
+        self._in_flight_by_session: dict[Hashable, int] = {}
+        self._condition = asyncio.Condition()
+        self.queue_depth = Gauge(
+            "mcp_admission_queue_depth", "Tool calls and resource reads waiting for a slot"
+        )
+        self.in_flight_calls = Gauge(
+            "mcp_admission_in_flight", "Tool calls and resource reads being handled"
+        )
+        self.open_sessions = Gauge("mcp_admission_sessions", "Open SSE sessions")
+        self.wait_time = Histogram(
+            "mcp_admission_wait_seconds",
+            "Time tool calls and resource reads waited for a slot, admitted or not",
+            (),
+            buckets=WAIT_BUCKETS,
+        )
+        self.rejected = Counter(
+            "mcp_admission_rejected_total",
+            "Sessions and calls turned away because the server was at capacity",
+            ("kind",),
+        )
+
+    def metrics(self) -> list:
+        return [
+            self.queue_depth,
+            self.in_flight_calls,
+            self.open_sessions,
+            self.wait_time,
+            self.rejected,
+        ]
+
+    def open_session(self) -> bool:
+        """Count a new session, or return False when `max_sessions` are already open."""
+        if 0 < self.settings.max_sessions <= self.sessions:
+            self.rejected.inc("session")
+            return False
+        self.sessions += 1
+        self.open_sessions.inc()
+        return True
+
+    def close_session(self) -> None:
+        self.sessions -= 1
+        self.open_sessions.dec()
+
+    def _has_room(self, session: Hashable) -> bool:
+        settings = self.settings
+        if 0 < settings.max_calls <= self.in_flight:
+            return False
+        return not 0 < settings.max_calls_per_session <= self._in_flight_by_session.get(session, 0)
+
+    @asynccontextmanager
+    async def admit(self, session: Hashable) -> AsyncIterator[None]:
+        """Hold a call slot of `session` for the duration of the block."""
+        start = time.perf_counter()
+        self.queue_depth.inc()
+        try:
+            async with asyncio.timeout(self.settings.max_wait):
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self._has_room(session))
+                    self.in_flight += 1
+                    self._in_flight_by_session[session] = (
+                        self._in_flight_by_session.get(session, 0) + 1
+                    )
+        except TimeoutError:
+            self.rejected.inc("call")
+            raise McpError(
+                types.ErrorData(
+                    code=SERVER_BUSY,
+                    message=f"Server busy, no slot freed up within {self.settings.max_wait:g}s; "
+                    "retry later",
+                )
+            )
+        finally:
+            self.queue_depth.dec()
+            self.wait_time.observe(time.perf_counter() - start)
+
+        self.in_flight_calls.inc()
+        try:
+            yield
+        finally:
+            self.in_flight_calls.dec()
+            async with self._condition:
+                self.in_flight -= 1
+                self._in_flight_by_session[session] -= 1
+                if self._in_flight_by_session[session] <= 0:
+                    del self._in_flight_by_session[session]
+                self._condition.notify_all()
+
+    def instrument_server(self, mcp: FastMCP) -> None:
+        """Gate the tool call and resource read handlers of the low-level server."""
+        wrap_request_handlers(mcp, self._gated, kinds=("tool", "resource"))
+
+    def _gated(self, handler, kind: str, get_name):
+        async def gated_handler(req):
+            session = request_ctx.get().session
+            # Stateless HTTP requests each get a new session object but carry the session id
+            async with self.admit(getattr(session, "session_id", None) or session):
+                return await handler(req)
+
+        return gated_handler
+
+
+def admission_from_env() -> Optional[AdmissionController]:
+    """The admission controller, or None when no limit is configured."""
+    settings = AdmissionSettings.from_env()
+    return AdmissionController(settings) if settings.enabled else None
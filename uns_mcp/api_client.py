@@ -0,0 +1,162 @@
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import httpx
+from unstructured_client import UnstructuredClient
+from unstructured_client._hooks.types import BeforeRequestContext, BeforeRequestHook
+from unstructured_client.utils import BackoffStrategy, RetryConfig
+
+from resilience import UpstreamResilience
+from settings import env_bool, env_float, env_int
+from singleflight import RequestCoalescer
+
+logger = logging.getLogger(__name__)
+
+NO_RETRIES = RetryConfig("none", BackoffStrategy(0, 0, 1, 0), False)
+
+
+@dataclass
+class HttpPoolSettings:
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "HttpPoolSettings":
+        """Build the connection pool settings of the Unstructured API client from the env."""
+        return cls(
+            max_connections=env_int("UNSTRUCTURED_HTTP_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=env_int(
+                "UNSTRUCTURED_HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections
+            ),
+            keepalive_expiry=env_float(
+                "UNSTRUCTURED_HTTP_KEEPALIVE_EXPIRY_SECONDS", cls.keepalive_expiry
+            ),
+            connect_timeout=env_float(
+                "UNSTRUCTURED_HTTP_CONNECT_TIMEOUT_SECONDS", cls.connect_timeout
+            ),
+            read_timeout=env_float("UNSTRUCTURED_HTTP_READ_TIMEOUT_SECONDS", cls.read_timeout),
+            write_timeout=env_float("UNSTRUCTURED_HTTP_WRITE_TIMEOUT_SECONDS", cls.write_timeout),
+            pool_timeout=env_float("UNSTRUCTURED_HTTP_POOL_TIMEOUT_SECONDS", cls.pool_timeout),
+            http2=env_bool("UNSTRUCTURED_HTTP2", cls.http2),
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+def create_http_client(
+    settings: HttpPoolSettings,
+    resilience: Optional[UpstreamResilience] = None,
+    coalescer: Optional[RequestCoalescer] = None,
+) -> httpx.AsyncClient:
+    """Create the pooled HTTP client shared by every Unstructured API call of the server.
+
+    Connections are kept alive for `keepalive_expiry` seconds, so the requests of a fan-out
+    tool call or of consecutive calls reuse warm TLS connections. HTTP/2 multiplexes them over
+    a single connection but needs the optional `h2` package (`pip install httpx[http2]`).
+
+    Args:
+        settings: Pool limits, keep-alive expiry, timeouts and HTTP/2 switch
+        resilience: Optional retries and circuit breakers applied to every request
+        coalescer: Optional sharing of identical concurrent GET requests, applied before the
+            retries so that one caller retries for all of them
+    """
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("UNSTRUCTURED_HTTP2 is set but the h2 package is missing, using HTTP/1.1")
+        http2 = False
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+    )
+    if resilience is not None:
+        transport = resilience.transport(transport)
+    if coalescer is not None:
+        transport = coalescer.transport(transport)
+    return httpx.AsyncClient(transport=transport, timeout=settings.timeout)
+
+
+class DefaultTimeoutHook(BeforeRequestHook):
+    """Apply `timeout` to requests sent without one.
+
+    Unless an operation is given `timeout_ms`, the SDK builds its requests with an explicit
+    `timeout=None`, which disables every timeout instead of using the client defaults.
+    """
+
+    def __init__(self, timeout: httpx.Timeout):
+        self.timeout = timeout
+
+    def before_request(
+        self, hook_ctx: BeforeRequestContext, request: httpx.Request
+    ) -> Union[httpx.Request, Exception]:
+        timeouts = request.extensions.get("timeout")
+        if timeouts is None or all(value is None for value in timeouts.values()):
+            request.extensions["timeout"] = self.timeout.as_dict()
+        return request
+
+
+class ServerUrlHook(BeforeRequestHook):
+    """Send every request to `server_url` instead of the hosted Platform API.
+
+    The platform operations of the SDK ignore the client-level `server_url` and always use
+    their own default server, so the target is swapped on each outgoing request instead.
+    """
+
+    def __init__(self, server_url: str):
+        self.server_url = httpx.URL(server_url)
+
+    def before_request(
+        self, hook_ctx: BeforeRequestContext, request: httpx.Request
+    ) -> Union[httpx.Request, Exception]:
+        request.url = request.url.copy_with(
+            scheme=self.server_url.scheme,
+            host=self.server_url.host,
+            port=self.server_url.port,
+        )
+        request.headers["host"] = request.url.netloc.decode("ascii")
+        return request
+
+
+def create_client(
+    api_key: str,
+    server_url: Optional[str] = None,
+    async_client: Optional[httpx.AsyncClient] = None,
+    sdk_retries: bool = True,
+) -> UnstructuredClient:
+    """Create the Unstructured API client, optionally pointed at another deployment.
+
+    Args:
+        api_key: The Unstructured API key
+        server_url: Optional base URL, such as the local fake platform used by the benchmarks
+        async_client: Optional HTTP client used for the async operations, its timeouts apply
+            to every request
+        sdk_retries: Whether the SDK retries failed requests itself. Its default policy
+            retries every operation, creates included, on 5xx and connection errors for up to
+            30 minutes; turn it off when `async_client` retries with `UpstreamResilience`
+    """
+    kwargs = {} if sdk_retries else {"retry_config": NO_RETRIES}
+    client = UnstructuredClient(api_key_auth=api_key, async_client=async_client, **kwargs)
+    hooks = client.sdk_configuration.get_hooks()
+    if server_url:
+        hooks.register_before_request_hook(ServerUrlHook(server_url))
+    if async_client is not None:
+        hooks.register_before_request_hook(DefaultTimeoutHook(async_client.timeout))
+    return client
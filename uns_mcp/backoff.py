@@ -0,0 +1,11 @@
+import random
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter for the given zero-based attempt number.
+
+    The delay grows as base * 2**attempt up to cap, and a random jitter of up to half the delay
+    is subtracted so that concurrent pollers do not synchronize.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay - random.uniform(0, delay / 2)
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def gather_bounded(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int,
+) -> list[tuple[T, Union[R, Exception]]]:
+    """Call `fn` for every item concurrently, with at most `limit` calls in flight.
+
+    Duplicate items are only fetched once. Failures do not cancel the other calls; the
+    exception is returned in place of the result for that item.
+
+    Returns:
+        A list of (item, result or exception) pairs in the order the items were given
+    """
+    unique_items = list(dict.fromkeys(items))
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def call(item: T) -> Union[R, Exception]:
+        async with semaphore:
+            try:
+                return await fn(item)
+            except Exception as e:
+                return e
+
+    results = await asyncio.gather(*(call(item) for item in unique_items))
+    return list(zip(unique_items, results))
@@ -0,0 +1,241 @@
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
+
+from bson.decimal128 import Decimal128
+from pymongo import ReplaceOne
+from pymongo.collection import Collection
+
+CURRENCY_SYMBOLS = {
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "₦": "NGN",
+    "¥": "JPY",
+    "₹": "INR",
+}
+CURRENCY_CODES = ("USD", "EUR", "GBP", "NGN", "JPY", "INR", "CAD", "AUD", "CHF", "ZAR", "KES", "GHS")
+
+_CURRENCY = (
+    "(?P<currency>" + "|".join(re.escape(symbol) for symbol in CURRENCY_SYMBOLS)
+    + "|" + "|".join(CURRENCY_CODES) + ")"
+)
+# 1,234.56 / 1.234,56 / 1 234,56 / 1'234.56, or no thousands separator. The decimal separator
+# differs from the thousands one. A number that goes on (2.500,005) is not matched at all, so
+# the amount is left unset rather than read wrong.
+_NUMBER = (
+    r"(?P<number>\d{1,3}(?P<thousands>[,.' \u00a0\u202f])\d{3}(?:(?P=thousands)\d{3})*"
+    r"(?:(?!(?P=thousands))[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)(?![.,]?\d)"
+)
+_THOUSANDS = re.compile(r"[,.' \u00a0\u202f]")
+_DECIMALS = re.compile(r"[.,](\d{1,2})$")
+
+_TOTAL_RE = re.compile(
+    r"\b(?:grand\s+total|total\s+due|amount\s+due|balance\s+due|total)\s*(?:amount)?\s*[:\-]?\s*"
+    + _CURRENCY + r"?\s*" + _NUMBER,
+    re.IGNORECASE,
+)
+_AMOUNT_RE = re.compile(_CURRENCY + r"\s*" + _NUMBER)
+_INVOICE_NUMBER_RE = re.compile(
+    r"invoice\s*(?:no\.?|number|num\.?|#)\s*[:#]?\s*(?P<number>[A-Z0-9][A-Z0-9\-/]{0,30})",
+    re.IGNORECASE,
+)
+_NOT_CURRENCY = r"(?!(?:" + "|".join(CURRENCY_CODES) + r")\b)"
+# Labels of the fields that often follow the vendor on the same line
+FIELD_LABELS = (
+    "Date", "Invoice", "Inv", "Total", "Subtotal", "Amount", "Balance", "Due", "No", "Number",
+    "Bill", "Tax", "VAT", "Ref", "Reference", "Order", "PO", "Account", "Terms", "Payment",
+)
+_NOT_LABEL = r"(?!(?i:" + "|".join(FIELD_LABELS) + r")\b)"
+# Initials (A.B. Smith) and dotted names (Acme.io) are kept, a sentence-ending dot ends the vendor
+_VENDOR_WORD = (
+    _NOT_CURRENCY + _NOT_LABEL + r"(?:(?:[A-Z]\.)+(?=[ \t]+[A-Z])|[A-Z&][\w&'-]*(?:\.[\w&'-]+)*)"
+)
+_VENDOR_RE = re.compile(
+    r"\b(?i:bill(?:ed)?\s+from|invoice\s+from|vendor|from|by)\s*[:\-]?\s*"
+    r"(?P<vendor>" + _VENDOR_WORD + r"(?:[ \t]+" + _VENDOR_WORD + r"){0,5})"
+)
+_DATE_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}\b"), ("%Y-%m-%d",)),
+    (re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b"), ("%m/%d/%Y", "%d/%m/%Y")),
+    (
+        re.compile(r"\b[A-Z][a-z]{2,8}\.? \d{1,2},? \d{4}\b"),
+        ("%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y"),
+    ),
+    (
+        re.compile(r"\b\d{1,2} [A-Z][a-z]{2,8},? \d{4}\b"),
+        ("%d %B %Y", "%d %b %Y", "%d %B, %Y", "%d %b, %Y"),
+    ),
+]
+
+
+def _parse_amount(number: str) -> Optional[Decimal]:
+    # A separator followed by one or two final digits is the decimal one, any other groups
+    # thousands: 2.500,00 and 2,500.00 are 2500, 2.500 is 2500 too and 2.50 is 2.5
+    decimals = _DECIMALS.search(number)
+    integer = number[:decimals.start()] if decimals else number
+    value = _THOUSANDS.sub("", integer) + ("." + decimals.group(1) if decimals else "")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _parse_currency(currency: Optional[str]) -> Optional[str]:
+    if not currency:
+        return None
+    return CURRENCY_SYMBOLS.get(currency, currency.upper())
+
+
+def _parse_date(text: str) -> Optional[datetime]:
+    for pattern, formats in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            value = match.group(0).replace(".", "")
+            for date_format in formats:
+                try:
+                    return datetime.strptime(value, date_format)
+                except ValueError:
+                    continue
+    return None
+
+
+def extract_invoice_fields(text: str) -> dict[str, Any]:
+    """Parse vendor, invoice number, date, currency and amount out of an invoice chunk.
+
+    The amount is the labelled total when there is one, otherwise the largest currency amount
+    in the chunk. `parsed` is True when at least a vendor and an amount were found.
+    """
+    fields: dict[str, Any] = {}
+
+    vendor = _VENDOR_RE.search(text)
+    if vendor:
+        fields["vendor"] = vendor.group("vendor").strip(" .,-")
+        fields["vendor_key"] = fields["vendor"].lower()
+
+    invoice_number = _INVOICE_NUMBER_RE.search(text)
+    if invoice_number:
+        fields["invoice_number"] = invoice_number.group("number")
+
+    date = _parse_date(text)
+    if date:
+        fields["date"] = date
+
+    total = _TOTAL_RE.search(text)
+    if total:
+        amount, currency = _parse_amount(total.group("number")), total.group("currency")
+    else:
+        candidates = [
+            (_parse_amount(match.group("number")), match.group("currency"))
+            for match in _AMOUNT_RE.finditer(text)
+        ]
+        candidates = [candidate for candidate in candidates if candidate[0] is not None]
+        amount, currency = max(candidates, key=lambda candidate: candidate[0], default=(None, None))
+
+    if currency is None:
+        any_currency = _AMOUNT_RE.search(text)
+        currency = any_currency.group("currency") if any_currency else None
+
+    if amount is not None:
+        fields["amount"] = Decimal128(amount)
+    if currency:
+        fields["currency"] = _parse_currency(currency)
+
+    fields["parsed"] = "vendor" in fields and "amount" in fields
+    return fields
+
+
+def extract_and_store(
+    chunks: Collection,
+    invoices: Collection,
+    reextract: bool = False,
+    batch_size: int = 500,
+) -> tuple[int, int]:
+    """Store the fields extracted from every chunk that does not have them yet in `invoices`.
+
+    The documents of `invoices` share the `_id` of their chunk. Chunks are compared by `_id`,
+    so fields of chunks that were deleted, e.g. when a workflow run replaced the chunks of a
+    file, are removed and the new chunks are parsed. The destination collection is only read.
+
+    Args:
+        chunks: The MongoDB destination collection written by the Unstructured workflow
+        invoices: The collection holding the extracted fields
+        reextract: Re-parse every chunk, e.g. after the extraction rules changed
+        batch_size: Number of chunks read and written per round trip
+
+    Returns:
+        The number of chunks scanned and the number with a vendor and an amount
+    """
+    chunk_ids = {doc["_id"] for doc in chunks.find({}, {"_id": 1}).batch_size(batch_size)}
+    extracted_ids = {doc["_id"] for doc in invoices.find({}, {"_id": 1}).batch_size(batch_size)}
+
+    removed = list(extracted_ids - chunk_ids)
+    for start in range(0, len(removed), batch_size):
+        invoices.delete_many({"_id": {"$in": removed[start:start + batch_size]}})
+
+    pending = list(chunk_ids if reextract else chunk_ids - extracted_ids)
+    scanned = parsed = 0
+    for start in range(0, len(pending), batch_size):
+        updates = []
+        batch = {"_id": {"$in": pending[start:start + batch_size]}}
+        for doc in chunks.find(batch, {"text": 1}):
+            fields = extract_invoice_fields(doc.get("text") or "")
+            scanned += 1
+            parsed += fields["parsed"]
+            updates.append(ReplaceOne({"_id": doc["_id"]}, fields, upsert=True))
+        if updates:
+            invoices.bulk_write(updates, ordered=False)
+    return scanned, parsed
+
+
+# Chunks of the same invoice repeat its number and total, so they are collapsed per invoice
+# before the per-vendor totals are computed. The pipeline runs on the extracted fields.
+VENDOR_TOTALS_PIPELINE = [
+    {"$match": {"parsed": True}},
+    {
+        "$group": {
+            "_id": {
+                "vendor": "$vendor_key",
+                "currency": "$currency",
+                "invoice": {"$ifNull": ["$invoice_number", "$_id"]},
+            },
+            "vendor": {"$first": "$vendor"},
+            "amount": {"$max": "$amount"},
+            "date": {"$min": "$date"},
+        }
+    },
+    {
+        "$group": {
+            "_id": {"vendor": "$_id.vendor", "currency": "$_id.currency"},
+            "vendor": {"$first": "$vendor"},
+            "total_amount": {"$sum": "$amount"},
+            "invoice_count": {"$sum": 1},
+            "first_invoice_date": {"$min": "$date"},
+            "last_invoice_date": {"$max": "$date"},
+        }
+    },
+    {"$sort": {"total_amount": -1}},
+    {
+        "$project": {
+            "_id": 0,
+            "vendor": 1,
+            "currency": "$_id.currency",
+            "total_amount": 1,
+            "invoice_count": 1,
+            "first_invoice_date": 1,
+            "last_invoice_date": 1,
+        }
+    },
+]
+
+
+def to_plain_row(row: dict) -> dict:
+    """Convert BSON values of an aggregation row into JSON friendly ones."""
+    plain = {}
+    for key, value in row.items():
+        if isinstance(value, Decimal128):
+            value = str(value.to_decimal())
+        elif isinstance(value, datetime):
+            value = value.date().isoformat()
+        plain[key] = value
+    return plain
@@ -0,0 +1,210 @@
+import asyncio
+import itertools
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+from bson import json_util
+from pymongo.collection import Collection
+
+from mongo_pool import MongoPool, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Tokens around the matched terms in a passage; FTS5 allows at most 64
+SNIPPET_TOKENS = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text,
+    content='chunks',
+    content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+"""
+
+
+def fts_any(*terms: str) -> str:
+    """Build an FTS5 expression matching any of the terms, quoting them as literals."""
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+    return "(" + " OR ".join(quoted) + ")"
+
+
+def fts_all(*expressions: str) -> str:
+    """Combine FTS5 expressions so that all of them have to match."""
+    return " AND ".join(expressions)
+
+
+class InvoiceMirror:
+    """Local SQLite FTS5 copy of the invoice chunks stored in the MongoDB destination.
+
+    The mirror is synced incrementally by comparing the `_id`s on both sides: chunks that are
+    gone from MongoDB, e.g. replaced by a workflow re-run, are removed and only missing ones are
+    copied, whatever their `_id` order. It works against Atlas, a plain local mongod, or offline
+    once synced. Lookups are ranked with BM25 and never leave the process.
+
+    Apart from start and stop, methods are blocking and serialized with a lock; call them
+    through a thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync_interval: float = 60.0,
+        batch_size: int = 1000,
+        page_size: int = 500,
+    ):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self._task: Optional[asyncio.Task] = None
+
+    def sync(self, collection: Collection, rebuild: bool = False) -> int:
+        """Reconcile the mirror with the collection and return how many chunks were copied.
+
+        Only `_id`s are compared, so a chunk edited in place keeps its old text until `rebuild`.
+
+        Args:
+            collection: The MongoDB destination collection
+            rebuild: Drop the local copy first and sync every document again
+        """
+        with self._lock:
+            if rebuild:
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.commit()
+            local_ids = {row[0] for row in self._conn.execute("SELECT doc_id FROM chunks")}
+
+        if not local_ids:
+            # Copying everything takes one pass over the collection rather than many $in queries
+            synced = 0
+            cursor = collection.find({}, {"text": 1}).batch_size(self.batch_size)
+            while batch := list(itertools.islice(cursor, self.batch_size)):
+                synced += self._write_batch(batch)
+            return synced
+
+        remote_ids = {
+            json_util.dumps(doc["_id"]): doc["_id"]
+            for doc in collection.find({}, {"_id": 1}).batch_size(self.batch_size)
+        }
+        removed = list(local_ids - remote_ids.keys())
+        if removed:
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM chunks WHERE doc_id = ?", [(doc_id,) for doc_id in removed]
+                )
+                self._conn.commit()
+            logger.info(f"Removed {len(removed)} deleted invoice chunks from {self.path}")
+
+        # The lock is only held while writing so searches keep running during a long sync
+        synced = 0
+        missing = [remote_ids[doc_id] for doc_id in remote_ids.keys() - local_ids]
+        for start in range(0, len(missing), self.batch_size):
+            batch = {"_id": {"$in": missing[start:start + self.batch_size]}}
+            synced += self._write_batch(list(collection.find(batch, {"text": 1})))
+        return synced
+
+    def _write_batch(self, docs: list[dict]) -> int:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks(doc_id, text) VALUES (?, ?) "
+                "ON CONFLICT(doc_id) DO UPDATE SET text = excluded.text",
+                [(json_util.dumps(doc["_id"]), doc.get("text") or "") for doc in docs],
+            )
+            self._conn.commit()
+        return len(docs)
+
+    def search(self, expression: str, limit: Optional[int] = None, offset: int = 0) -> list[dict]:
+        """Return the chunks matching an FTS5 expression, best BM25 match first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunks.text AS text FROM chunks_fts "
+                "JOIN chunks ON chunks.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ? OFFSET ?",
+                (expression, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [{"text": row["text"]} for row in rows]
+
+    def search_passages(
+        self, expression: str, limit: Optional[int] = None, offset: int = 0
+    ) -> list[dict]:
+        """Like `search`, but return the best matching passage and score instead of the text."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT snippet(chunks_fts, 0, '', '', '...', ?) AS passage, "
+                "bm25(chunks_fts) AS rank FROM chunks_fts "
+                "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                (SNIPPET_TOKENS, expression, -1 if limit is None else limit, offset),
+            ).fetchall()
+        # bm25() is lower for better matches, scores are reported higher-is-better like Atlas
+        return [{"passages": [row["passage"]], "score": -row["rank"]} for row in rows]
+
+    def search_page(
+        self,
+        expression: str,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """Return one page of `search` results and the continuation token for the next page."""
+        page_size = max(1, page_size or self.page_size)
+        offset = decode_cursor(cursor) if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        docs = self.search(expression, limit=page_size + 1, offset=offset)
+        if len(docs) <= page_size:
+            return docs, None
+        return docs[:page_size], encode_cursor(offset + page_size)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def start(self, mongo: MongoPool) -> None:
+        """Keep the mirror in sync with the MongoDB collection in the background."""
+        if self._task is None and self.sync_interval > 0:
+            self._task = asyncio.create_task(self._run(mongo), name="invoice-mirror-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self, mongo: MongoPool) -> None:
+        while True:
+            try:
+                synced = await mongo.run(self.sync, mongo.collection)
+                if synced:
+                    logger.info(f"Synced {synced} invoice chunks into {self.path}")
+            except Exception as e:
+                logger.warning(f"Invoice mirror sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
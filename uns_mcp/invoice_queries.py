@@ -0,0 +1,140 @@
+import copy
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+from bson.decimal128 import Decimal128
+
+from invoice_mirror import fts_all, fts_any
+
+INDEX_NAME = "search-text-index"
+# Vendor bills read "... from <vendor>" or "... by <vendor>"
+VENDOR_TERMS = ("from", "by")
+MAX_YEAR_SPAN = 50
+# Passages returned per chunk when only highlights are requested
+MAX_PASSAGES = 3
+
+
+@dataclass(frozen=True)
+class InvoiceQuery:
+    """Parameters of an invoice search; instances are hashable and used as cache keys."""
+
+    vendor: Optional[str] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    service: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    limit: Optional[int] = None
+    # Return the matched passages and search score instead of the whole chunk text
+    highlights: bool = False
+
+    @property
+    def years(self) -> list[str]:
+        if self.year_from is None and self.year_to is None:
+            return []
+        year_from = self.year_from if self.year_from is not None else self.year_to
+        year_to = self.year_to if self.year_to is not None else self.year_from
+        return [str(year) for year in range(year_from, year_to + 1)]
+
+    @property
+    def has_amount_filter(self) -> bool:
+        return self.min_amount is not None or self.max_amount is not None
+
+    def validate(self) -> Optional[str]:
+        """Return an error message for invalid parameters, or None."""
+        if self.year_from is not None and self.year_to is not None:
+            if self.year_to < self.year_from:
+                return f"Invalid year range: {self.year_from} to {self.year_to}"
+            if self.year_to - self.year_from >= MAX_YEAR_SPAN:
+                return f"Invalid year range: at most {MAX_YEAR_SPAN} years can be searched"
+        if (
+            self.min_amount is not None
+            and self.max_amount is not None
+            and self.max_amount < self.min_amount
+        ):
+            return f"Invalid amount range: {self.min_amount} to {self.max_amount}"
+        if self.limit is not None and self.limit < 1:
+            return f"Invalid limit: {self.limit}, must be at least 1"
+        return None
+
+
+@lru_cache(maxsize=256)
+def _compile_pipeline(
+    query: InvoiceQuery, index_name: str, invoice_collection: Optional[str]
+) -> tuple[dict, ...]:
+    must = [{"text": {"query": list(VENDOR_TERMS), "path": "text"}}]
+    if query.vendor:
+        must.append({"phrase": {"query": query.vendor, "path": "text"}})
+    if query.service:
+        must.append({"text": {"query": query.service, "path": "text"}})
+    if query.years:
+        must.append({"text": {"query": query.years, "path": "text"}})
+
+    search = {"index": index_name, "compound": {"must": must}}
+    if query.highlights:
+        search["highlight"] = {"path": "text", "maxNumPassages": MAX_PASSAGES}
+    pipeline = [{"$search": search}]
+
+    if query.has_amount_filter:
+        # Amounts come from the fields extracted by invoice_extraction, not from $search
+        amount_range = {}
+        if query.min_amount is not None:
+            amount_range["$gte"] = Decimal128(Decimal(str(query.min_amount)))
+        if query.max_amount is not None:
+            amount_range["$lte"] = Decimal128(Decimal(str(query.max_amount)))
+        pipeline.append(
+            {
+                "$lookup": {
+                    "from": invoice_collection,
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "invoice",
+                }
+            }
+        )
+        pipeline.append({"$match": {"invoice.amount": amount_range}})
+
+    if query.limit is not None:
+        pipeline.append({"$limit": query.limit})
+    if query.highlights:
+        pipeline.append(
+            {
+                "$project": {
+                    "_id": 0,
+                    "highlights": {"$meta": "searchHighlights"},
+                    "score": {"$meta": "searchScore"},
+                }
+            }
+        )
+    else:
+        pipeline.append({"$project": {"text": 1, "_id": 0}})
+    return tuple(pipeline)
+
+
+def build_pipeline(
+    query: InvoiceQuery,
+    index_name: str = INDEX_NAME,
+    invoice_collection: Optional[str] = None,
+) -> list[dict]:
+    """Return the `$search` aggregation pipeline for a query.
+
+    Amount filters join the extracted fields stored in `invoice_collection`.
+
+    Pipelines are compiled once per parameter combination and copied on every call, so callers
+    are free to extend the returned list.
+    """
+    return copy.deepcopy(list(_compile_pipeline(query, index_name, invoice_collection)))
+
+
+def build_fts_expression(query: InvoiceQuery) -> str:
+    """Return the equivalent FTS5 expression for the local invoice mirror."""
+    expressions = [fts_any(*VENDOR_TERMS)]
+    if query.vendor:
+        expressions.append(fts_any(query.vendor))
+    if query.service:
+        expressions.append(fts_any(query.service))
+    if query.years:
+        expressions.append(fts_any(*query.years))
+    return fts_all(*expressions)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from pymongo.errors import PyMongoError
+
+from mongo_pool import MongoPool
+
+logger = logging.getLogger(__name__)
+
+# Inserts, replacements and deletions of chunks, and updates that change their text
+TEXT_CHANGES_PIPELINE = [
+    {
+        "$match": {
+            "$or": [
+                {"operationType": {"$in": ["insert", "replace", "delete"]}},
+                {
+                    "operationType": "update",
+                    "updateDescription.updatedFields.text": {"$exists": True},
+                },
+            ]
+        }
+    }
+]
+
+
+class InvoiceWatcher:
+    """Call `on_change` whenever the invoice collection receives new data.
+
+    A change stream is used when the deployment supports it (Atlas and replica sets). A burst
+    of writes, such as a workflow run storing many chunks, triggers a single call once the
+    stream goes quiet for `max_await_ms`. Only changes to the chunk text count, so writes of
+    other fields, e.g. by other tools annotating the chunks, don't clear caches again. On a
+    standalone mongod, or if the stream fails, the watcher falls back to polling the document
+    count and highest `_id` every `poll_interval` seconds.
+
+    With `notify_on_start`, `on_change` is also called once as soon as the watcher is
+    listening, to catch up with what changed while the server was down.
+    """
+
+    def __init__(
+        self,
+        mongo: MongoPool,
+        on_change: Callable[[], Awaitable[None]],
+        poll_interval: float = 30.0,
+        max_await_ms: int = 1000,
+        notify_on_start: bool = False,
+    ):
+        self.mongo = mongo
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.max_await_ms = max_await_ms
+        self.notify_on_start = notify_on_start
+        self._notified = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="invoice-watcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            await self._watch_change_stream()
+        except PyMongoError as e:
+            logger.info(f"Change streams unavailable ({e}), polling for new invoices instead")
+        await self._poll_watermark()
+
+    async def _notify(self) -> None:
+        self._notified = True
+        try:
+            await self.on_change()
+        except Exception as e:
+            logger.warning(f"Invoice change handler failed: {e}")
+
+    async def _watch_change_stream(self) -> None:
+        # The stream blocks for up to max_await_ms per call, so it runs on its own thread
+        # rather than occupying one of the MongoDB read workers.
+        stream = await asyncio.to_thread(
+            self.mongo.collection.watch,
+            TEXT_CHANGES_PIPELINE,
+            max_await_time_ms=self.max_await_ms,
+        )
+        try:
+            # The stream is open, so nothing written from here on is missed by the first call
+            pending = self.notify_on_start and not self._notified
+            while True:
+                change = await asyncio.to_thread(stream.try_next)
+                if change is not None:
+                    pending = True
+                elif pending:
+                    pending = False
+                    await self._notify()
+        finally:
+            await asyncio.to_thread(stream.close)
+
+    def _fingerprint(self) -> tuple[int, Any]:
+        # The count catches deletions, the highest _id an insert that follows a deletion
+        collection = self.mongo.collection
+        doc = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        return collection.estimated_document_count(), doc["_id"] if doc else None
+
+    async def _poll_watermark(self) -> None:
+        watermark = None
+        initialized = False
+        while True:
+            try:
+                fingerprint = await self.mongo.run(self._fingerprint)
+                if initialized and fingerprint != watermark:
+                    await self._notify()
+                elif not initialized and self.notify_on_start and not self._notified:
+                    await self._notify()
+                watermark, initialized = fingerprint, True
+            except PyMongoError as e:
+                logger.warning(f"Polling the invoice collection failed: {e}")
+            await asyncio.sleep(self.poll_interval)
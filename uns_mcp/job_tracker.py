@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from typing import Optional
+
+from unstructured_client import UnstructuredClient
+from unstructured_client.models.operations import GetJobRequest, ListJobsRequest
+from unstructured_client.models.shared import JobInformation, JobStatus
+
+from batching import gather_bounded
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_JOB_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.STOPPED, JobStatus.FAILED})
+
+
+class JobTracker:
+    """In-memory table of job states kept fresh by a background task.
+
+    The table is seeded from the list jobs endpoint and afterwards only jobs that have not
+    reached a terminal status are re-polled. The poll interval starts at `min_interval` and
+    doubles up to `max_interval` while nothing changes; it drops back to `min_interval` as soon
+    as a job changes status or a new job is tracked. A full resync runs every
+    `resync_interval` seconds to pick up jobs started outside of this server.
+    """
+
+    def __init__(
+        self,
+        client: UnstructuredClient,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        resync_interval: float = 300.0,
+        max_concurrency: int = 8,
+    ):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.resync_interval = resync_interval
+        self.max_concurrency = max_concurrency
+        self._jobs: dict[str, JobInformation] = {}
+        self._synced_at: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="job-tracker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def track(self, job: JobInformation) -> None:
+        """Record a job state seen elsewhere, e.g. in the response of a workflow run."""
+        previous = self._jobs.get(job.id)
+        self._jobs[job.id] = job
+        if job.status not in TERMINAL_JOB_STATUSES and (
+            previous is None or previous.status != job.status
+        ):
+            self.wake()
+
+    def wake(self) -> None:
+        """Poll active jobs again right away, e.g. after a job was canceled."""
+        self._wakeup.set()
+
+    async def list_jobs(
+        self,
+        workflow_id: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        refresh: bool = False,
+    ) -> list[JobInformation]:
+        """Return tracked jobs, matching the filters of the list jobs endpoint.
+
+        Args:
+            workflow_id: Optional workflow ID to filter by
+            status: Optional job status to filter by
+            refresh: Re-list all jobs from the Unstructured API before answering
+        """
+        if refresh or self._synced_at is None:
+            await self.resync()
+
+        return [
+            job
+            for job in self._jobs.values()
+            if (workflow_id is None or job.workflow_id == workflow_id)
+            and (status is None or job.status == status)
+        ]
+
+    async def get_job(self, job_id: str, refresh: bool = False) -> JobInformation:
+        """Return a tracked job, fetching it from the Unstructured API if unknown or forced."""
+        job = self._jobs.get(job_id)
+        if job is None or refresh:
+            job = await self._fetch(job_id)
+            self.track(job)
+        return job
+
+    async def resync(self) -> None:
+        response = await self.client.jobs.list_jobs_async(request=ListJobsRequest())
+        jobs = {job.id: job for job in response.response_list_jobs}
+        # Jobs tracked after the list request was sent may be missing from the response
+        for job_id, job in self._jobs.items():
+            jobs.setdefault(job_id, job)
+        self._jobs = jobs
+        self._synced_at = asyncio.get_running_loop().time()
+
+    async def _fetch(self, job_id: str) -> JobInformation:
+        response = await self.client.jobs.get_job_async(request=GetJobRequest(job_id=job_id))
+        return response.job_information
+
+    async def _poll_active(self) -> bool:
+        """Re-poll non-terminal jobs and return True if any of them changed status."""
+        active = [job.id for job in self._jobs.values() if job.status not in TERMINAL_JOB_STATUSES]
+        changed = False
+        for job_id, outcome in await gather_bounded(self._fetch, active, self.max_concurrency):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Failed to poll job {job_id}: {outcome}")
+                continue
+            previous = self._jobs.get(job_id)
+            if previous is None or outcome.status != previous.status:
+                changed = True
+            self._jobs[job_id] = outcome
+        return changed
+
+    def _has_active_jobs(self) -> bool:
+        return any(job.status not in TERMINAL_JOB_STATUSES for job in self._jobs.values())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = self.min_interval
+        while True:
+            # Cleared before polling so that a wake-up during the poll is not lost
+            self._wakeup.clear()
+            try:
+                if (
+                    self._synced_at is None
+                    or loop.time() - self._synced_at >= self.resync_interval
+                ):
+                    await self.resync()
+                changed = await self._poll_active()
+                interval = self.min_interval if changed else min(interval * 2, self.max_interval)
+            except Exception as e:
+                logger.warning(f"Job tracker refresh failed: {e}")
+                interval = min(interval * 2, self.max_interval)
+
+            delay = interval if self._has_active_jobs() else self.max_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                interval = self.min_interval
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,88 @@
+import heapq
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 date or datetime, treating values without a timezone as UTC."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}, expected ISO 8601 such as 2024-05-01")
+    return as_utc(parsed)
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def filter_created(
+    items: Sequence[T],
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> list[T]:
+    """Keep the items whose `created_at` falls within [created_after, created_before)."""
+    if created_after is None and created_before is None:
+        return list(items)
+    return [
+        item
+        for item in items
+        if (created_after is None or as_utc(item.created_at) >= created_after)
+        and (created_before is None or as_utc(item.created_at) < created_before)
+    ]
+
+
+def top_k(
+    items: Sequence[T],
+    key: Callable[[T], Any],
+    limit: Optional[int],
+    offset: int = 0,
+    largest: bool = False,
+) -> list[T]:
+    """Return the window [offset, offset + limit) of the items ordered by key.
+
+    With a limit only offset + limit items are selected with a heap, which is O(n log k)
+    instead of sorting everything. With `largest` the window is taken from the end of the
+    ordering (e.g. the most recent N), but the result is still returned in ascending order.
+    """
+    if limit is None:
+        ordered = sorted(items, key=key)
+        if largest:
+            return ordered[: len(ordered) - offset] if offset else ordered
+        return ordered[offset:]
+
+    if largest:
+        return heapq.nlargest(offset + limit, items, key=key)[offset:][::-1]
+    return heapq.nsmallest(offset + limit, items, key=key)[offset:]
+
+
+def page_window(items: Sequence[T], limit: Optional[int], offset: int = 0) -> list[T]:
+    """Slice an already ordered sequence."""
+    if limit is None:
+        return list(items[offset:])
+    return list(items[offset : offset + limit])
+
+
+def describe_window(shown: int, total: int, offset: int) -> Optional[str]:
+    """Footer telling the caller how to fetch the remaining items, or None if all were shown."""
+    if shown == total:
+        return None
+    if shown == 0:
+        return f"No items at offset {offset}, {total} in total"
+    footer = f"Showing items {offset + 1}-{offset + shown} of {total}."
+    if offset + shown < total:
+        footer += f" Use offset={offset + shown} to see more."
+    return footer
+
+
+def validate_window(limit: Optional[int], offset: int) -> Optional[str]:
+    """Return an error message for an invalid limit/offset pair, or None."""
+    if limit is not None and limit < 1:
+        return f"Invalid limit: {limit}, must be at least 1"
+    if offset < 0:
+        return f"Invalid offset: {offset}, must not be negative"
+    return None
@@ -0,0 +1,313 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import Response
+from unstructured_client import UnstructuredClient
+from unstructured_client._hooks.types import (
+    AfterErrorContext,
+    AfterErrorHook,
+    AfterSuccessContext,
+    AfterSuccessHook,
+    BeforeRequestContext,
+    BeforeRequestHook,
+)
+
+from request_handlers import wrap_request_handlers
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; tool calls range from cached lookups to multi-second upstream fan-outs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (kind, name) of the MCP request being handled, read by the upstream hooks
+_current_request: ContextVar[Tuple[str, str]] = ContextVar("current_request", default=("", ""))
+# Failures recorded by the handler of the MCP request being handled, see `record_failure`
+_failures: ContextVar[Optional[list]] = ContextVar("request_failures", default=None)
+_START = "uns_mcp_metrics_start"
+
+
+def record_failure() -> None:
+    """Count the MCP request being handled as failed although it returns a normal result.
+
+    Tools and resources report most errors as text or an `error` field instead of raising, so
+    their error branches call this. It does nothing when metrics are disabled.
+    """
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(True)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), 0.0)]
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (not cumulative), the sum and the total count
+        self._values: dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._values.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted(
+                (label_values, (list(counts), total, count))
+                for label_values, (counts, total, count) in self._values.items()
+            )
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry, enough for counters, gauges and histograms."""
+
+    def __init__(self):
+        self._metrics: list[Union[Counter, Gauge, Histogram]] = []
+
+    def register(self, *metrics: Union[Counter, Gauge, Histogram]) -> None:
+        """Render metrics created elsewhere, such as the resilience layer counters."""
+        self._metrics.extend(metrics)
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _UpstreamHooks(BeforeRequestHook, AfterSuccessHook, AfterErrorHook):
+    """SDK hooks timing every Unstructured API request, retries included."""
+
+    def __init__(self, metrics: "ServerMetrics"):
+        self.metrics = metrics
+
+    def before_request(
+        self, hook_ctx: BeforeRequestContext, request: httpx.Request
+    ) -> Union[httpx.Request, Exception]:
+        request.extensions[_START] = time.perf_counter()
+        return request
+
+    def after_success(
+        self, hook_ctx: AfterSuccessContext, response: httpx.Response
+    ) -> Union[httpx.Response, Exception]:
+        self.metrics.observe_upstream(
+            hook_ctx.operation_id, response.request, str(response.status_code)
+        )
+        return response
+
+    def after_error(
+        self,
+        hook_ctx: AfterErrorContext,
+        response: Optional[httpx.Response],
+        error: Optional[Exception],
+    ) -> Union[Tuple[Optional[httpx.Response], Optional[Exception]], Exception]:
+        if response is not None:
+            self.metrics.observe_upstream(
+                hook_ctx.operation_id, response.request, str(response.status_code)
+            )
+        else:
+            try:
+                request = error.request
+            except (AttributeError, RuntimeError):
+                # httpx raises RuntimeError for errors not bound to a request
+                request = None
+            self.metrics.observe_upstream(hook_ctx.operation_id, request, "error")
+        return response, error
+
+
+class ServerMetrics:
+    """Latency and error metrics of MCP tool, prompt and resource requests.
+
+    Nothing is installed until `instrument_server` and `instrument_client` are called, so the
+    server runs unchanged when metrics are disabled. Upstream Unstructured API calls are
+    attributed to the MCP request that made them.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.requests = self.registry.histogram(
+            "mcp_request_duration_seconds",
+            "Time spent handling MCP tool calls, prompt gets and resource reads",
+            ("kind", "name"),
+        )
+        self.errors = self.registry.counter(
+            "mcp_request_errors_total",
+            "MCP requests that raised, returned an error result or reported a handled failure",
+            ("kind", "name"),
+        )
+        self.upstream_requests = self.registry.counter(
+            "mcp_upstream_requests_total",
+            "Unstructured API requests, including retries, by MCP request, operation and status",
+            ("kind", "name", "operation", "status"),
+        )
+        self.upstream_duration = self.registry.histogram(
+            "mcp_upstream_duration_seconds",
+            "Unstructured API request latency by MCP request and operation",
+            ("kind", "name", "operation"),
+        )
+
+    def instrument_server(self, mcp: FastMCP) -> None:
+        """Time the tool, prompt and resource handlers of the low-level server."""
+        wrap_request_handlers(mcp, self._timed)
+
+    def _timed(self, handler, kind: str, get_name):
+        async def timed_handler(req):
+            name = get_name(req)
+            token = _current_request.set((kind, name))
+            failures = []
+            failures_token = _failures.set(failures)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await handler(req)
+                failed = bool(getattr(result.root, "isError", False)) or bool(failures)
+                return result
+            finally:
+                self.requests.observe(time.perf_counter() - start, kind, name)
+                if failed:
+                    self.errors.inc(kind, name)
+                _failures.reset(failures_token)
+                _current_request.reset(token)
+
+        return timed_handler
+
+    def instrument_client(self, client: UnstructuredClient) -> None:
+        """Count and time the requests the client sends to the Unstructured API."""
+        hooks = _UpstreamHooks(self)
+        sdk_hooks = client.sdk_configuration.get_hooks()
+        sdk_hooks.register_before_request_hook(hooks)
+        sdk_hooks.register_after_success_hook(hooks)
+        sdk_hooks.register_after_error_hook(hooks)
+
+    def observe_upstream(
+        self, operation: str, request: Optional[httpx.Request], status: str
+    ) -> None:
+        kind, name = _current_request.get()
+        self.upstream_requests.inc(kind, name, operation, status)
+        start = request.extensions.get(_START) if request is not None else None
+        if start is not None:
+            self.upstream_duration.observe(time.perf_counter() - start, kind, name, operation)
+
+    async def endpoint(self, request: Request) -> Response:
+        """Starlette endpoint serving the metrics in the Prometheus text format."""
+        return Response(self.registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from bson import json_util
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from settings import env_int
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def encode_cursor(position: Any) -> str:
+    """Encode a resume position as an opaque, URL-safe continuation token.
+
+    The position is the last returned `_id` for MongoDB pages, or a row offset for the local
+    invoice mirror.
+    """
+    return base64.urlsafe_b64encode(json_util.dumps({"_id": position}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Decode a continuation token produced by `encode_cursor` back into its position."""
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(cursor.encode()))["_id"]
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+@dataclass
+class MongoSettings:
+    connection_string: str
+    database: str
+    collection: str
+    max_pool_size: int = 20
+    min_pool_size: int = 0
+    max_idle_time_ms: int = 60_000
+    server_selection_timeout_ms: int = 5_000
+    max_concurrent_reads: int = 8
+    page_size: int = 500
+    # Extracted invoice fields, kept apart from the collection the Unstructured workflow owns
+    invoice_collection: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["MongoSettings"]:
+        """Build the MongoDB settings from environment variables.
+
+        Returns None when the connection string, database or collection is missing so that
+        the server can still run the Unstructured API tools without a MongoDB destination.
+        """
+        connection_string = os.environ.get("MONGO_DB_CONNECTION_STRING")
+        database = os.environ.get("MONGO_DB_DATABASE")
+        collection = os.environ.get("MONGO_DB_COLLECTION")
+
+        if not all([connection_string, database, collection]):
+            return None
+
+        return cls(
+            connection_string=connection_string,
+            database=database,
+            collection=collection,
+            max_pool_size=env_int("MONGO_DB_MAX_POOL_SIZE", cls.max_pool_size),
+            min_pool_size=env_int("MONGO_DB_MIN_POOL_SIZE", cls.min_pool_size),
+            max_idle_time_ms=env_int("MONGO_DB_MAX_IDLE_TIME_MS", cls.max_idle_time_ms),
+            server_selection_timeout_ms=env_int(
+                "MONGO_DB_SERVER_SELECTION_TIMEOUT_MS", cls.server_selection_timeout_ms
+            ),
+            max_concurrent_reads=env_int("MONGO_DB_MAX_CONCURRENT_READS", cls.max_concurrent_reads),
+            page_size=env_int("MONGO_DB_PAGE_SIZE", cls.page_size),
+            invoice_collection=os.environ.get("MONGO_DB_INVOICE_COLLECTION"),
+        )
+
+
+class MongoPool:
+    """Process-wide MongoDB client shared by all invoice resources.
+
+    The underlying MongoClient keeps its own connection pool, so a single instance is created
+    in the server lifespan and closed on shutdown instead of connecting on every resource read.
+
+    PyMongo is blocking, so queries are run on a bounded thread pool through `run` and
+    `aggregate`. The pool size caps the number of concurrent MongoDB reads while keeping the
+    event loop free for other tool calls and SSE sessions.
+    """
+
+    def __init__(self, settings: MongoSettings, client: Optional[MongoClient] = None):
+        self.settings = settings
+        # An existing client can be passed in, e.g. an in-memory stand-in for benchmarks
+        self.client: MongoClient = client or MongoClient(
+            settings.connection_string,
+            maxPoolSize=settings.max_pool_size,
+            minPoolSize=settings.min_pool_size,
+            maxIdleTimeMS=settings.max_idle_time_ms,
+            serverSelectionTimeoutMS=settings.server_selection_timeout_ms,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.max_concurrent_reads),
+            thread_name_prefix="mongo-read",
+        )
+
+    @property
+    def collection(self) -> Collection:
+        return self.client[self.settings.database][self.settings.collection]
+
+    @property
+    def invoices(self) -> Collection:
+        """The collection holding the fields extracted from each chunk, keyed by chunk `_id`."""
+        name = self.settings.invoice_collection or f"{self.settings.collection}_invoices"
+        return self.client[self.settings.database][name]
+
+    def ping(self) -> bool:
+        """Health probe: return True if the cluster answers a ping."""
+        try:
+            self.client.admin.command("ping")
+            return True
+        except PyMongoError as e:
+            logger.warning(f"MongoDB health check failed: {e}")
+            return False
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking PyMongo call on the read executor without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def aggregate(
+        self, pipeline: list[dict], collection: Optional[Collection] = None, **kwargs: Any
+    ) -> list[dict]:
+        """Run an aggregation pipeline off the event loop and return all documents.
+
+        The pipeline runs on the destination collection unless another `collection` is given.
+        """
+        collection = collection if collection is not None else self.collection
+        return await self.run(lambda: list(collection.aggregate(pipeline, **kwargs)))
+
+    async def aggregate_page(
+        self,
+        pipeline: list[dict],
+        projection: dict,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """Run one page of an aggregation pipeline in `_id` order.
+
+        Only `page_size + 1` documents are pulled from the server (in batches of `page_size`), so
+        memory per call stays bounded regardless of the collection size.
+
+        Args:
+            pipeline: Leading stages, e.g. the `$search` stage
+            projection: `$project` specification applied to the returned documents
+            page_size: Maximum number of documents to return, defaults to MONGO_DB_PAGE_SIZE
+            cursor: Continuation token returned by a previous call
+
+        Returns:
+            The documents of this page and the token for the next page, or None on the last page
+        """
+        page_size = max(1, page_size or self.settings.page_size)
+        stages = list(pipeline)
+        if cursor:
+            stages.append({"$match": {"_id": {"$gt": decode_cursor(cursor)}}})
+        stages.extend(
+            [
+                {"$sort": {"_id": 1}},
+                {"$limit": page_size + 1},
+                # _id is always kept to build the continuation token
+                {"$project": {**projection, "_id": 1}},
+            ]
+        )
+        keep_id = projection.get("_id", 1) not in (0, False)
+
+        def fetch() -> tuple[list[dict], Optional[str]]:
+            docs = []
+            with self.collection.aggregate(stages, batchSize=page_size) as result:
+                for doc in result:
+                    docs.append(doc)
+            next_cursor = None
+            if len(docs) > page_size:
+                docs = docs[:page_size]
+                next_cursor = encode_cursor(docs[-1]["_id"])
+            if not keep_id:
+                for doc in docs:
+                    doc.pop("_id", None)
+            return docs, next_cursor
+
+        return await self.run(fetch)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
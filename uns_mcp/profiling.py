@@ -0,0 +1,176 @@
+import asyncio
+import cProfile
+import hashlib
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+from request_handlers import wrap_request_handlers
+from settings import env_bool, env_float, env_str
+
+logger = logging.getLogger(__name__)
+
+# Key of the request `_meta` field with which a client asks for a profile of one call
+PROFILE_META_KEY = "profile"
+
+
+def arguments_hash(arguments: Optional[dict]) -> str:
+    """Short stable hash of request arguments, used to tell profiles of one tool apart."""
+    encoded = json.dumps(arguments or {}, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:12]
+
+
+def _safe_name(name: str) -> str:
+    # Resource URIs such as invoices://vendor/year are not valid file names
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "request"
+
+
+class LoopStallMonitor:
+    """Log a warning whenever the event loop is blocked for longer than `threshold` seconds.
+
+    A task sleeps for `interval` seconds and measures how late it wakes up; a late wake-up
+    means a handler ran synchronous code (parsing, validation, a blocking client call)
+    without yielding. The requests in flight at that moment are named in the warning.
+    """
+
+    def __init__(self, threshold: float, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval if interval is not None else min(threshold / 2, 0.1)
+        self.in_flight: dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-stall-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            stall = loop.time() - start - self.interval
+            if stall > self.threshold:
+                requests = ", ".join(sorted(self.in_flight)) or "no MCP request"
+                logger.warning(
+                    f"Event loop blocked for {stall * 1000:.0f} ms while handling: {requests}"
+                )
+
+
+class RequestProfiler:
+    """cProfile traces of selected MCP tool calls, prompt gets and resource reads.
+
+    A request is profiled when its name (tool or prompt name, resource URI) is listed in
+    `names`, or `*` is, or, with `on_request`, when the client sets `"profile": true` in the
+    request `_meta`. Each trace is written to `directory` as
+    `<kind>-<name>-<arguments hash>-<timestamp>.prof`, readable with `pstats` or snakeviz.
+
+    cProfile sees the event loop thread only: MongoDB queries run on worker threads and show
+    up as time awaiting them, and other requests handled while the profile is running are
+    included in it. One request is profiled at a time; overlapping ones run unprofiled.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        names: Iterable[str] = (),
+        on_request: bool = False,
+        stall_monitor: Optional[LoopStallMonitor] = None,
+    ):
+        self.directory = Path(directory)
+        self.names = frozenset(names)
+        self.on_request = on_request
+        self.stall_monitor = stall_monitor
+        self._profiling = False
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """Build the profiler from the environment, or None when nothing is enabled."""
+        tools = env_str("MCP_PROFILE_TOOLS") or ""
+        names = [name.strip() for name in tools.split(",") if name.strip()]
+        on_request = env_bool("MCP_PROFILE_ON_REQUEST", False)
+        stall_ms = env_float("MCP_LOOP_STALL_MS", 0.0)
+        if not names and not on_request and stall_ms <= 0:
+            return None
+        return cls(
+            Path(env_str("MCP_PROFILE_DIR", "profiles")),
+            names=names,
+            on_request=on_request,
+            stall_monitor=LoopStallMonitor(stall_ms / 1000) if stall_ms > 0 else None,
+        )
+
+    def instrument_server(self, mcp: FastMCP) -> None:
+        """Wrap the tool, prompt and resource handlers of the low-level server."""
+        wrap_request_handlers(mcp, self._wrap)
+
+    def _wants_profile(self, name: str, params: Any) -> bool:
+        if "*" in self.names or name in self.names:
+            return True
+        if not self.on_request or getattr(params, "meta", None) is None:
+            return False
+        return bool(getattr(params.meta, PROFILE_META_KEY, False))
+
+    def _wrap(self, handler, kind: str, get_name):
+        async def wrapped_handler(req):
+            name = get_name(req)
+            label = f"{kind} {name}"
+            in_flight = self.stall_monitor.in_flight if self.stall_monitor is not None else None
+            if in_flight is not None:
+                in_flight[label] = in_flight.get(label, 0) + 1
+            try:
+                if self._profiling or not self._wants_profile(name, req.params):
+                    return await handler(req)
+                return await self._profile(handler, req, kind, name)
+            finally:
+                if in_flight is not None:
+                    in_flight[label] -= 1
+                    if in_flight[label] <= 0:
+                        del in_flight[label]
+
+        return wrapped_handler
+
+    async def _profile(self, handler, req, kind: str, name: str):
+        profile = cProfile.Profile()
+        self._profiling = True
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return await handler(req)
+        finally:
+            profile.disable()
+            self._profiling = False
+            elapsed = time.perf_counter() - start
+            arguments = getattr(req.params, "arguments", None)
+            now = time.time()
+            timestamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(now))
+            timestamp += f".{int(now * 1000) % 1000:03d}"
+            path = self.directory / (
+                f"{kind}-{_safe_name(name)}-{arguments_hash(arguments)}-{timestamp}.prof"
+            )
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(str(path))
+                logger.info(f"Profiled {kind} {name} ({elapsed * 1000:.0f} ms): {path}")
+            except OSError as e:
+                logger.warning(f"Could not write the profile of {kind} {name}: {e}")
+
+    def start(self) -> None:
+        if self.stall_monitor is not None:
+            self.stall_monitor.start()
+
+    async def stop(self) -> None:
+        if self.stall_monitor is not None:
+            await self.stall_monitor.stop()
@@ -0,0 +1,32 @@
+from typing import Any, Awaitable, Callable, Iterable
+
+from mcp import types
+from mcp.server.fastmcp import FastMCP
+
+Handler = Callable[[Any], Awaitable[Any]]
+# Turns a handler into one that does something around it, given the request kind and a way of
+# reading the tool, prompt or resource name from the request
+HandlerWrapper = Callable[[Handler, str, Callable[[Any], str]], Handler]
+
+# Request type of each kind of request, and how to read the name of what it asks for
+REQUEST_NAMES = {
+    "tool": (types.CallToolRequest, lambda req: req.params.name),
+    "prompt": (types.GetPromptRequest, lambda req: req.params.name),
+    "resource": (types.ReadResourceRequest, lambda req: str(req.params.uri)),
+}
+
+
+def wrap_request_handlers(
+    mcp: FastMCP,
+    wrap: HandlerWrapper,
+    kinds: Iterable[str] = ("tool", "prompt", "resource"),
+) -> None:
+    """Replace the tool, prompt and resource handlers of the low-level server by wrapped ones.
+
+    The last wrapper installed runs first, around the ones installed before it.
+    """
+    handlers = mcp._mcp_server.request_handlers  # noqa: WPS437
+    for kind in kinds:
+        request_type, get_name = REQUEST_NAMES[kind]
+        if request_type in handlers:
+            handlers[request_type] = wrap(handlers[request_type], kind, get_name)
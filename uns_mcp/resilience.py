@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from unstructured_client.models.errors import HTTPValidationError, SDKError
+
+from metrics import Counter
+from settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to send again when the first attempt may or may not have been applied
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+def endpoint_group(url: httpx.URL) -> str:
+    """Endpoint group of a Platform API URL: `sources`, `destinations`, `workflows` or `jobs`."""
+    segments = [segment for segment in url.path.split("/") if segment]
+    if len(segments) >= 3 and segments[0] == "api":
+        return segments[2]
+    return segments[0] if segments else "root"
+
+
+def _failed(status_code: int) -> bool:
+    # Errors that say the API is unhealthy, as opposed to a bad request or a throttled client
+    return status_code >= 500
+
+
+def is_client_error(error: BaseException) -> bool:
+    """Whether an SDK error is a rejected request that will fail the same way when repeated.
+
+    4xx responses such as an unknown id are; throttling (429), request timeouts (408), 5xx
+    responses, transport errors and an open circuit are transient.
+    """
+    if isinstance(error, HTTPValidationError):
+        return True
+    return isinstance(error, SDKError) and 400 <= error.status_code < 500 and (
+        error.status_code not in (408, 429)
+    )
+
+
+@dataclass
+class ResilienceSettings:
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "ResilienceSettings":
+        """Build the retry and circuit breaker settings from environment variables."""
+        return cls(
+            max_attempts=max(env_int("UNSTRUCTURED_RETRY_MAX_ATTEMPTS", cls.max_attempts), 1),
+            backoff_base=env_float("UNSTRUCTURED_RETRY_BACKOFF_SECONDS", cls.backoff_base),
+            backoff_max=env_float("UNSTRUCTURED_RETRY_BACKOFF_MAX_SECONDS", cls.backoff_max),
+            breaker_failures=env_int("UNSTRUCTURED_BREAKER_FAILURES", cls.breaker_failures),
+            breaker_reset=env_float("UNSTRUCTURED_BREAKER_RESET_SECONDS", cls.breaker_reset),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (from 1), with full jitter.
+
+        A `Retry-After` sent with a 429 or 503 is honoured up to `backoff_max`.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit of its endpoint group is open."""
+
+    def __init__(self, group: str, retry_in: float):
+        super().__init__(
+            f"Unstructured API {group} endpoints are failing, not calling them for "
+            f"another {retry_in:.0f}s"
+        )
+        self.group = group
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one endpoint group.
+
+    After `failures` consecutive failures the circuit opens and requests fail fast for
+    `reset` seconds. Then a single trial request is let through (half-open): success closes
+    the circuit, failure opens it for another `reset` seconds.
+    """
+
+    def __init__(self, failures: int, reset: float):
+        self.failures = failures
+        self.reset = reset
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset:
+            return "open"
+        return "half_open"
+
+    def before_request(self) -> Optional[float]:
+        """Admit a request, or return the seconds left before the circuit lets one through."""
+        state = self.state
+        if state == "closed":
+            return None
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return None
+        return max(self.reset - (time.monotonic() - self.opened_at), 0.0)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure, returning True when it opens the circuit."""
+        self.consecutive_failures += 1
+        reopening = self.trial_in_flight
+        self.trial_in_flight = False
+        if reopening or (self.opened_at is None and self.consecutive_failures >= self.failures):
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+class UpstreamResilience:
+    """Retries and circuit breakers shared by every Unstructured API request of the process.
+
+    Idempotent requests (GET) are retried on connection errors, timeouts, 429 and 502-504
+    with jittered exponential backoff. Every request, retried or not, goes through the
+    circuit breaker of its endpoint group, so that when the API is down the sessions fail
+    fast instead of each waiting on timeouts. The breakers live here rather than in the HTTP
+    client so that they are shared by all sessions.
+    """
+
+    def __init__(self, settings: ResilienceSettings):
+        self.settings = settings
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.retries = Counter(
+            "mcp_upstream_retries_total",
+            "Unstructured API requests sent again after a transient failure",
+            ("group", "reason"),
+        )
+        self.trips = Counter(
+            "mcp_upstream_circuit_trips_total",
+            "Times the circuit breaker of an endpoint group opened",
+            ("group",),
+        )
+        self.rejected = Counter(
+            "mcp_upstream_circuit_rejected_total",
+            "Unstructured API requests failed fast because their circuit was open",
+            ("group",),
+        )
+
+    def counters(self) -> list[Counter]:
+        return [self.retries, self.trips, self.rejected]
+
+    def breaker(self, group: str) -> CircuitBreaker:
+        if group not in self.breakers:
+            self.breakers[group] = CircuitBreaker(
+                self.settings.breaker_failures, self.settings.breaker_reset
+            )
+        return self.breakers[group]
+
+    def transport(self, transport: httpx.AsyncBaseTransport) -> "ResilientTransport":
+        """Wrap the transport of an HTTP client with these retries and breakers."""
+        return ResilientTransport(transport, self)
+
+    def record(self, group: str, failed: bool) -> None:
+        breaker = self.breaker(group)
+        if not failed:
+            breaker.record_success()
+        elif breaker.record_failure():
+            self.trips.inc(group)
+            logger.warning(
+                f"Unstructured API {group} endpoints are failing, pausing calls for "
+                f"{self.settings.breaker_reset:.0f}s"
+            )
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, resilience: UpstreamResilience):
+        self.transport = transport
+        self.resilience = resilience
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        resilience = self.resilience
+        settings = resilience.settings
+        group = endpoint_group(request.url)
+        attempts = settings.max_attempts if request.method in IDEMPOTENT_METHODS else 1
+        attempt = 1
+        while True:
+            retry_in = resilience.breaker(group).before_request()
+            if retry_in is not None:
+                resilience.rejected.inc(group)
+                raise CircuitOpenError(group, retry_in)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except asyncio.CancelledError:
+                # A cancelled half-open trial must not keep the circuit waiting for its outcome
+                resilience.breaker(group).trial_in_flight = False
+                raise
+            except httpx.TransportError as e:
+                resilience.record(group, failed=True)
+                if attempt >= attempts:
+                    raise
+                reason, retry_after = type(e).__name__, None
+            else:
+                resilience.record(group, failed=_failed(response.status_code))
+                if attempt >= attempts or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                reason, retry_after = str(response.status_code), _retry_after(response)
+                await response.aclose()
+            resilience.retries.inc(group, reason)
+            await asyncio.sleep(settings.backoff(attempt, retry_after))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        # HTTP dates are not worth parsing here; fall back to the regular backoff
+        return None
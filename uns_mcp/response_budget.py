@@ -0,0 +1,65 @@
+from typing import Optional
+
+# Rough average for English text with the common BPE tokenizers
+CHARS_PER_TOKEN = 4
+# Shortest passage worth returning, which bounds how many results fit in a budget
+MIN_PASSAGE_CHARS = 50
+
+
+def budget_chars(max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> Optional[int]:
+    """Return the tighter of a character and a token budget in characters, or None for no budget."""
+    limits = [limit for limit in (max_chars, max_tokens and max_tokens * CHARS_PER_TOKEN) if limit]
+    return min(limits) if limits else None
+
+
+def budget_limit(max_chars: int) -> int:
+    """Number of ranked results worth fetching for a character budget.
+
+    Searches under a budget are limited to it, so the server never ranks, transfers and caches
+    every match only for most of them to be dropped by `fit_to_budget`.
+    """
+    return max(1, max_chars // MIN_PASSAGE_CHARS)
+
+
+def atlas_passages(highlights: list[dict]) -> list[str]:
+    """Join the hit and text fragments of `$search` highlights into passages, best first."""
+    ranked = sorted(highlights, key=lambda highlight: highlight.get("score", 0), reverse=True)
+    return [
+        "".join(fragment["value"] for fragment in highlight.get("texts", [])).strip()
+        for highlight in ranked
+    ]
+
+
+def fit_to_budget(results: list[dict], max_chars: int) -> tuple[list[dict], int]:
+    """Keep the passages of ranked results until the character budget is spent.
+
+    Results are taken in order and their passages added one at a time; the first passage that
+    does not fit ends the response, so a lower ranked result never displaces a better one. A
+    best passage longer than the whole budget is cut to fit.
+
+    Args:
+        results: Search results with `passages` and `score`, best match first
+        max_chars: Maximum total length of the returned passages
+
+    Returns:
+        The results that fit, some possibly with fewer passages, and the number of results
+        left out entirely
+    """
+    kept = []
+    used = 0
+    for result in results:
+        passages = []
+        for passage in result["passages"]:
+            if used + len(passage) > max_chars:
+                if not kept and not passages:
+                    # Cut the best passage rather than return nothing at all
+                    passages.append(passage[:max_chars])
+                    used = max_chars
+                break
+            passages.append(passage)
+            used += len(passage)
+        if passages:
+            kept.append({**result, "passages": passages})
+        if len(passages) < len(result["passages"]):
+            break
+    return kept, len(results) - len(kept)
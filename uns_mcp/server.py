@@ -1,10 +1,14 @@
-import json
+import asyncio
 import os
 import sys
+import tempfile
+from collections import Counter
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from typing import AsyncIterator, Optional
+from dataclasses import asdict, dataclass, replace
+from typing import AsyncIterator, Optional, Union
 
+import anyio
+import pydantic_core
 import uvicorn
 from docstring_extras import add_custom_node_examples  # relative import required by mcp
 from dotenv import load_dotenv
@@ -13,6 +17,7 @@ from mcp.server.fastmcp import Context, FastMCP
 from mcp.server.sse import SseServerTransport
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Mount, Route
 from unstructured_client import UnstructuredClient
 from unstructured_client.models.operations import (
@@ -24,7 +29,6 @@ from unstructured_client.models.operations import (
     GetSourceRequest,
     GetWorkflowRequest,
     ListDestinationsRequest,
-    ListJobsRequest,
     ListSourcesRequest,
     ListWorkflowsRequest,
     RunWorkflowRequest,
@@ -33,6 +37,7 @@ from unstructured_client.models.operations import (
 from unstructured_client.models.shared import (
     CreateWorkflow,
     DestinationConnectorType,
+    JobInformation,
     JobStatus,
     SourceConnectorType,
     UpdateWorkflow,
@@ -41,27 +46,56 @@ from unstructured_client.models.shared import (
 from unstructured_client.models.shared.createworkflow import CreateWorkflowTypedDict
 
 from connectors import register_connectors
+from connectors.utils import invalidate_listing_cache
+
+from admission import admission_from_env
+from api_client import HttpPoolSettings, create_client, create_http_client
+from backoff import backoff_delay
+from batching import gather_bounded
+from cache import TTLCache
+from job_tracker import TERMINAL_JOB_STATUSES, JobTracker
+from listing import (
+    describe_window,
+    filter_created,
+    page_window,
+    parse_datetime,
+    top_k,
+    validate_window,
+)
+from invoice_extraction import VENDOR_TOTALS_PIPELINE, extract_and_store, to_plain_row
+from invoice_mirror import InvoiceMirror, fts_any
+from invoice_queries import InvoiceQuery, build_fts_expression, build_pipeline
+from invoice_watch import InvoiceWatcher
+from metrics import ServerMetrics, record_failure
+from mongo_pool import MongoPool, MongoSettings
+from profiling import RequestProfiler
+from resilience import ResilienceSettings, UpstreamResilience, is_client_error
+from response_budget import atlas_passages, budget_chars, budget_limit, fit_to_budget
+from settings import env_bool, env_float, env_int, env_str
+from singleflight import RequestCoalescer
+from stateless_http import StatelessHttpTransport, session_store_from_env
+from subscriptions import ResourceSubscriptions, register_resource_subscriptions
+
+# Resources whose content changes when new invoice chunks land in MongoDB
+INVOICE_RESOURCE_URIS = (
+    "invoices://vendor",
+    "invoices://vendor/totals",
+    "invoices://vendor/year",
+    "invoices://vendor/service",
+)
 
-from pymongo import MongoClient
-from pprint import PrettyPrinter
 
-def get_mongodb_connection():
-    load_dotenv(override=True)
+def get_invoice_mirror() -> Optional[InvoiceMirror]:
+    """Return the local invoice mirror, or None when INVOICE_MIRROR_PATH is not set."""
+    return mcp.get_context().request_context.lifespan_context.mirror
 
-    # Fixed variable names
-    mongodb_connection_string = os.environ.get("MONGO_DB_CONNECTION_STRING")
-    mongodb_database = os.environ.get("MONGO_DB_DATABASE")  # Fixed typo
-    mongodb_collection = os.environ.get("MONGO_DB_COLLECTION")  # Fixed typo
 
-    # Validate environment variables
-    if not all([mongodb_connection_string, mongodb_database, mongodb_collection]):
+def get_mongodb_connection() -> MongoPool:
+    """Return the MongoDB pool owned by the server lifespan."""
+    mongo = mcp.get_context().request_context.lifespan_context.mongo
+    if mongo is None:
         raise ValueError("Missing MongoDB environment variables")
-
-    try:
-        client = MongoClient(mongodb_connection_string)
-        return client[mongodb_database][mongodb_collection]
-    except Exception as e:
-        raise ConnectionError(f"Failed to connect to MongoDB: {str(e)}")
+    return mongo
 
 
 def load_environment_variables() -> None:
@@ -80,21 +114,133 @@ def load_environment_variables() -> None:
 @dataclass
 class AppContext:
     client: UnstructuredClient
+    listing_cache: TTLCache
+    invoice_cache: TTLCache
+    jobs: JobTracker
+    subscriptions: ResourceSubscriptions
+    mongo: Optional[MongoPool] = None
+    mirror: Optional[InvoiceMirror] = None
 
 
 @asynccontextmanager
-async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
-    """Manage Unstructured API client lifecycle"""
+async def create_app_context() -> AsyncIterator[AppContext]:
+    """Create the Unstructured API and MongoDB clients, caches and background tasks"""
     api_key = os.getenv("UNSTRUCTURED_API_KEY")
     if not api_key:
         raise ValueError("UNSTRUCTURED_API_KEY environment variable is required")
 
-    client = UnstructuredClient(api_key_auth=api_key)
+    http_client = create_http_client(
+        HttpPoolSettings.from_env(), resilience=resilience, coalescer=coalescer
+    )
+    # UNSTRUCTURED_API_URL points the client at another deployment, such as the local fake
+    # platform in benchmarks/fake_platform.py. Retries are left to the resilience layer.
+    client = create_client(
+        api_key,
+        server_url=env_str("UNSTRUCTURED_API_URL"),
+        async_client=http_client,
+        sdk_retries=False,
+    )
+    if metrics is not None:
+        metrics.instrument_client(client)
+    listing_cache = TTLCache(
+        ttl=env_float("UNSTRUCTURED_LIST_CACHE_TTL_SECONDS", 30.0),
+        maxsize=env_int("UNSTRUCTURED_LIST_CACHE_MAX_ENTRIES", 128),
+    )
+    invoice_cache = TTLCache(
+        ttl=env_float("INVOICE_QUERY_CACHE_TTL_SECONDS", 60.0),
+        maxsize=env_int("INVOICE_QUERY_CACHE_MAX_ENTRIES", 256),
+    )
+
+    jobs = JobTracker(
+        client,
+        min_interval=env_float("UNSTRUCTURED_JOB_POLL_MIN_SECONDS", 5.0),
+        max_interval=env_float("UNSTRUCTURED_JOB_POLL_MAX_SECONDS", 60.0),
+        resync_interval=env_float("UNSTRUCTURED_JOB_RESYNC_SECONDS", 300.0),
+        max_concurrency=env_int("UNSTRUCTURED_MAX_CONCURRENT_REQUESTS", 8),
+    )
+
+    mongo = None
+    mongo_settings = MongoSettings.from_env()
+    if mongo_settings is not None:
+        mongo = MongoPool(mongo_settings)
+        # The probe only logs; invoice resources report their own errors on read
+        await mongo.run(mongo.ping)
+
+    mirror = None
+    mirror_path = env_str("INVOICE_MIRROR_PATH")
+    if mirror_path:
+        mirror = InvoiceMirror(
+            mirror_path,
+            sync_interval=env_float("INVOICE_MIRROR_SYNC_SECONDS", 60.0),
+            page_size=env_int("MONGO_DB_PAGE_SIZE", 500),
+        )
+        if mongo is not None:
+            mirror.start(mongo)
+
+    subscriptions = ResourceSubscriptions()
+    watcher = None
+    if mongo is not None:
+
+        async def on_invoices_changed() -> None:
+            # Extraction follows the collection here rather than on every read, so reads never
+            # scan it; the destination collection is only read
+            await mongo.run(extract_and_store, mongo.collection, mongo.invoices)
+            invoice_cache.clear()
+            if mirror is not None:
+                await mongo.run(mirror.sync, mongo.collection)
+            await subscriptions.notify(INVOICE_RESOURCE_URIS)
+
+        watcher = InvoiceWatcher(
+            mongo,
+            on_invoices_changed,
+            poll_interval=env_float("INVOICE_WATCH_POLL_SECONDS", 30.0),
+            notify_on_start=True,
+        )
+        watcher.start()
+
+    jobs.start()
+    if profiler is not None:
+        profiler.start()
     try:
-        yield AppContext(client=client)
+        yield AppContext(
+            client=client,
+            listing_cache=listing_cache,
+            invoice_cache=invoice_cache,
+            jobs=jobs,
+            subscriptions=subscriptions,
+            mongo=mongo,
+            mirror=mirror,
+        )
     finally:
-        # No cleanup needed for the API client
-        pass
+        if profiler is not None:
+            await profiler.stop()
+        await jobs.stop()
+        if watcher is not None:
+            await watcher.stop()
+        if mirror is not None:
+            await mirror.stop()
+            mirror.close()
+        if mongo is not None:
+            mongo.close()
+        await http_client.aclose()
+
+
+# Created once by the SSE app at startup and shared by all of its sessions
+shared_app_context: Optional[AppContext] = None
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    """Manage Unstructured API and MongoDB client lifecycle
+
+    Over stdio this runs once. The SSE app runs it for every connection, so there it hands out
+    the shared context instead of building clients, pools and caches for each session.
+    """
+    if shared_app_context is not None:
+        yield shared_app_context
+        return
+    async with create_app_context() as context:
+        yield context
 
 
 # Create MCP server instance
@@ -106,21 +252,91 @@ mcp = FastMCP(
 
 
 register_connectors(mcp)
+register_resource_subscriptions(mcp)
+
+# Retries of idempotent Unstructured API calls and circuit breakers per endpoint group, shared
+# by all sessions so that an outage trips them once for everyone
+resilience = UpstreamResilience(ResilienceSettings.from_env())
+# Identical concurrent reads, e.g. several agents polling the same job, share one request
+coalescer = RequestCoalescer() if env_bool("UNSTRUCTURED_COALESCE_REQUESTS", True) else None
+
+# Latency and error metrics per tool, prompt and resource, served on /metrics in SSE mode.
+# When disabled nothing is wrapped, so requests take exactly the uninstrumented path.
+metrics = ServerMetrics() if env_bool("MCP_METRICS_ENABLED", False) else None
+if metrics is not None:
+    metrics.instrument_server(mcp)
+    metrics.registry.register(*resilience.counters())
+    if coalescer is not None:
+        metrics.registry.register(*coalescer.counters())
+
+# cProfile traces of the requests named in MCP_PROFILE_TOOLS, or of those a client flags when
+# MCP_PROFILE_ON_REQUEST is set, and warnings when the event loop stalls for MCP_LOOP_STALL_MS
+profiler = RequestProfiler.from_env()
+if profiler is not None:
+    profiler.instrument_server(mcp)
+
+# Caps on SSE sessions and on tool calls and resource reads in flight, overall and per session.
+# Wrapped last so that time spent queueing is not counted as handler latency.
+admission = admission_from_env()
+if admission is not None:
+    admission.instrument_server(mcp)
+    if metrics is not None:
+        metrics.registry.register(*admission.metrics())
+
+# Upper bound on concurrent upstream calls made by a single batch tool
+MAX_CONCURRENT_REQUESTS = env_int("UNSTRUCTURED_MAX_CONCURRENT_REQUESTS", 8)
+# Shortest delay between two polls of the same jobs, whatever the tool arguments ask for
+MIN_JOB_POLL_INTERVAL_SECONDS = 0.5
+
+
+def _format_batch_results(label: str, results: list[tuple[str, Union[str, Exception]]]) -> str:
+    if not results:
+        return f"No {label} IDs given"
+
+    sections = []
+    for item_id, outcome in results:
+        if isinstance(outcome, Exception):
+            sections.append(f"Error getting {label} {item_id}: {str(outcome)}")
+        else:
+            sections.append(outcome)
+
+    failed = sum(isinstance(outcome, Exception) for _, outcome in results)
+    if failed:
+        record_failure()
+    summary = f"Fetched {len(results) - failed} of {len(results)} {label}s"
+    return "\n\n".join([summary, *sections])
 
 
 @mcp.tool()
-async def list_sources(ctx: Context, source_type: Optional[str] = None) -> str:
+async def list_sources(
+    ctx: Context,
+    source_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    since: Optional[str] = None,
+) -> str:
     """
     List available sources from the Unstructured API.
 
     Args:
         source_type: Optional source connector type to filter by
+        limit: Optional maximum number of sources to return
+        offset: Optional number of sources to skip, in name order
+        since: Optional ISO 8601 date; only sources created at or after it are returned
 
     Returns:
         String containing the list of sources
     """
     client = ctx.request_context.lifespan_context.client
 
+    error = validate_window(limit, offset)
+    if error:
+        return error
+    try:
+        created_after = parse_datetime(since) if since else None
+    except ValueError as e:
+        return str(e)
+
     request = ListSourcesRequest()
     if source_type:
         source_type = source_type.upper()  # it needs uppercase to access
@@ -129,19 +345,33 @@ async def list_sources(ctx: Context, source_type: Optional[str] = None) -> str:
         except KeyError:
             return f"Invalid source type: {source_type}"
 
-    response = await client.sources.list_sources_async(request=request)
-
-    # Sort sources by name
-    sorted_sources = sorted(response.response_list_sources, key=lambda source: source.name.lower())
+    cache = ctx.request_context.lifespan_context.listing_cache
+    cache_key = ("sources", source_type)
+    sorted_sources = cache.get(cache_key)
+    if sorted_sources is None:
+        generation = cache.generation
+        response = await client.sources.list_sources_async(request=request)
+
+        # Sort sources by name
+        sorted_sources = sorted(
+            response.response_list_sources,
+            key=lambda source: source.name.lower(),
+        )
+        cache.set(cache_key, sorted_sources, generation)
 
-    if not sorted_sources:
+    matching_sources = filter_created(sorted_sources, created_after=created_after)
+    if not matching_sources:
         return "No sources found"
 
     # Format response
     result = ["Available sources:"]
-    for source in sorted_sources:
+    for source in page_window(matching_sources, limit, offset):
         result.append(f"- {source.name} (ID: {source.id})")
 
+    footer = describe_window(len(result) - 1, len(matching_sources), offset)
+    if footer:
+        result.append(footer)
+
     return "\n".join(result)
 
 
@@ -178,8 +408,10 @@ async def get_source_info(ctx: Context, source_id: str) -> str:
 
     response = await client.sources.get_source_async(request=GetSourceRequest(source_id=source_id))
 
-    info = response.source_connector_information
+    return _format_source_info(response.source_connector_information)
 
+
+def _format_source_info(info) -> str:
     result = ["Source Connector Information:"]
     result.append(f"Name: {info.name}")
     result.append("Configuration:")
@@ -190,17 +422,56 @@ async def get_source_info(ctx: Context, source_id: str) -> str:
 
 
 @mcp.tool()
-async def list_destinations(ctx: Context, destination_type: Optional[str] = None) -> str:
+async def get_sources_info(ctx: Context, source_ids: list[str]) -> str:
+    """Get detailed information about several source connectors in one call.
+
+    Args:
+        source_ids: IDs of the source connectors to get information for, should be valid UUIDs
+
+    Returns:
+        String containing the information or the error for each source connector
+    """
+    client = ctx.request_context.lifespan_context.client
+
+    async def fetch(source_id: str) -> str:
+        response = await client.sources.get_source_async(
+            request=GetSourceRequest(source_id=source_id),
+        )
+        return _format_source_info(response.source_connector_information)
+
+    results = await gather_bounded(fetch, source_ids, limit=MAX_CONCURRENT_REQUESTS)
+    return _format_batch_results("source", results)
+
+
+@mcp.tool()
+async def list_destinations(
+    ctx: Context,
+    destination_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    since: Optional[str] = None,
+) -> str:
     """List available destinations from the Unstructured API.
 
     Args:
         destination_type: Optional destination connector type to filter by
+        limit: Optional maximum number of destinations to return
+        offset: Optional number of destinations to skip, in name order
+        since: Optional ISO 8601 date; only destinations created at or after it are returned
 
     Returns:
         String containing the list of destinations
     """
     client = ctx.request_context.lifespan_context.client
 
+    error = validate_window(limit, offset)
+    if error:
+        return error
+    try:
+        created_after = parse_datetime(since) if since else None
+    except ValueError as e:
+        return str(e)
+
     request = ListDestinationsRequest()
     if destination_type:
         destination_type = destination_type.upper()
@@ -209,20 +480,31 @@ async def list_destinations(ctx: Context, destination_type: Optional[str] = None
         except KeyError:
             return f"Invalid destination type: {destination_type}"
 
-    response = await client.destinations.list_destinations_async(request=request)
+    cache = ctx.request_context.lifespan_context.listing_cache
+    cache_key = ("destinations", destination_type)
+    sorted_destinations = cache.get(cache_key)
+    if sorted_destinations is None:
+        generation = cache.generation
+        response = await client.destinations.list_destinations_async(request=request)
 
-    sorted_destinations = sorted(
-        response.response_list_destinations,
-        key=lambda dest: dest.name.lower(),
-    )
+        sorted_destinations = sorted(
+            response.response_list_destinations,
+            key=lambda dest: dest.name.lower(),
+        )
+        cache.set(cache_key, sorted_destinations, generation)
 
-    if not sorted_destinations:
+    matching_destinations = filter_created(sorted_destinations, created_after=created_after)
+    if not matching_destinations:
         return "No destinations found"
 
     result = ["Available destinations:"]
-    for dest in sorted_destinations:
+    for dest in page_window(matching_destinations, limit, offset):
         result.append(f"- {dest.name} (ID: {dest.id})")
 
+    footer = describe_window(len(result) - 1, len(matching_destinations), offset)
+    if footer:
+        result.append(footer)
+
     return "\n".join(result)
 
 
@@ -260,8 +542,10 @@ async def get_destination_info(ctx: Context, destination_id: str) -> str:
         request=GetDestinationRequest(destination_id=destination_id),
     )
 
-    info = response.destination_connector_information
+    return _format_destination_info(response.destination_connector_information)
 
+
+def _format_destination_info(info) -> str:
     result = ["Destination Connector Information:"]
     result.append(f"Name: {info.name}")
     result.append("Configuration:")
@@ -271,12 +555,37 @@ async def get_destination_info(ctx: Context, destination_id: str) -> str:
     return "\n".join(result)
 
 
+@mcp.tool()
+async def get_destinations_info(ctx: Context, destination_ids: list[str]) -> str:
+    """Get detailed information about several destination connectors in one call.
+
+    Args:
+        destination_ids: IDs of the destination connectors to get information for
+
+    Returns:
+        String containing the information or the error for each destination connector
+    """
+    client = ctx.request_context.lifespan_context.client
+
+    async def fetch(destination_id: str) -> str:
+        response = await client.destinations.get_destination_async(
+            request=GetDestinationRequest(destination_id=destination_id),
+        )
+        return _format_destination_info(response.destination_connector_information)
+
+    results = await gather_bounded(fetch, destination_ids, limit=MAX_CONCURRENT_REQUESTS)
+    return _format_batch_results("destination", results)
+
+
 @mcp.tool()
 async def list_workflows(
     ctx: Context,
     destination_id: Optional[str] = None,
     source_id: Optional[str] = None,
     status: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    since: Optional[str] = None,
 ) -> str:
     """
     List workflows from the Unstructured API.
@@ -285,12 +594,23 @@ async def list_workflows(
         destination_id: Optional destination connector ID to filter by
         source_id: Optional source connector ID to filter by
         status: Optional workflow status to filter by
+        limit: Optional maximum number of workflows to return
+        offset: Optional number of workflows to skip, in name order
+        since: Optional ISO 8601 date; only workflows created at or after it are returned
 
     Returns:
         String containing the list of workflows
     """
     client = ctx.request_context.lifespan_context.client
 
+    error = validate_window(limit, offset)
+    if error:
+        return error
+    try:
+        created_after = parse_datetime(since) if since else None
+    except ValueError as e:
+        return str(e)
+
     request = ListWorkflowsRequest(destination_id=destination_id, source_id=source_id)
 
     if status:
@@ -299,22 +619,33 @@ async def list_workflows(
         except KeyError:
             return f"Invalid workflow status: {status}"
 
-    response = await client.workflows.list_workflows_async(request=request)
-
-    # Sort workflows by name
-    sorted_workflows = sorted(
-        response.response_list_workflows,
-        key=lambda workflow: workflow.name.lower(),
-    )
+    cache = ctx.request_context.lifespan_context.listing_cache
+    cache_key = ("workflows", destination_id, source_id, status)
+    sorted_workflows = cache.get(cache_key)
+    if sorted_workflows is None:
+        generation = cache.generation
+        response = await client.workflows.list_workflows_async(request=request)
+
+        # Sort workflows by name
+        sorted_workflows = sorted(
+            response.response_list_workflows,
+            key=lambda workflow: workflow.name.lower(),
+        )
+        cache.set(cache_key, sorted_workflows, generation)
 
-    if not sorted_workflows:
+    matching_workflows = filter_created(sorted_workflows, created_after=created_after)
+    if not matching_workflows:
         return "No workflows found"
 
     # Format response
     result = ["Available workflows:"]
-    for workflow in sorted_workflows:
+    for workflow in page_window(matching_workflows, limit, offset):
         result.append(f"- {workflow.name} (ID: {workflow.id})")
 
+    footer = describe_window(len(result) - 1, len(matching_workflows), offset)
+    if footer:
+        result.append(footer)
+
     return "\n".join(result)
 
 
@@ -371,8 +702,10 @@ async def get_workflow_info(ctx: Context, workflow_id: str) -> str:
         request=GetWorkflowRequest(workflow_id=workflow_id),
     )
 
-    info = response.workflow_information
+    return _format_workflow_info(response.workflow_information)
+
 
+def _format_workflow_info(info) -> str:
     result = ["Workflow Information:"]
     result.append(f"Name: {info.name}")
     result.append(f"ID: {info.id}")
@@ -394,6 +727,28 @@ async def get_workflow_info(ctx: Context, workflow_id: str) -> str:
     return "\n".join(result)
 
 
+@mcp.tool()
+async def get_workflows_info(ctx: Context, workflow_ids: list[str]) -> str:
+    """Get detailed information about several workflows in one call.
+
+    Args:
+        workflow_ids: IDs of the workflows to get information for
+
+    Returns:
+        String containing the information or the error for each workflow
+    """
+    client = ctx.request_context.lifespan_context.client
+
+    async def fetch(workflow_id: str) -> str:
+        response = await client.workflows.get_workflow_async(
+            request=GetWorkflowRequest(workflow_id=workflow_id),
+        )
+        return _format_workflow_info(response.workflow_information)
+
+    results = await gather_bounded(fetch, workflow_ids, limit=MAX_CONCURRENT_REQUESTS)
+    return _format_batch_results("workflow", results)
+
+
 @mcp.tool()
 @add_custom_node_examples  # Note: This documentation is added due to lack of typing in
 # WorkflowNode.settings. It can be safely deleted when typing is added.
@@ -427,10 +782,12 @@ async def create_workflow(ctx: Context, workflow_config: CreateWorkflowTypedDict
         response = await client.workflows.create_workflow_async(
             request=CreateWorkflowRequest(create_workflow=workflow),
         )
+        invalidate_listing_cache(ctx)
 
         info = response.workflow_information
         return await get_workflow_info(ctx, info.id)
     except Exception as e:
+        record_failure()
         return f"Error creating workflow: {str(e)}"
 
 
@@ -450,11 +807,78 @@ async def run_workflow(ctx: Context, workflow_id: str) -> str:
         response = await client.workflows.run_workflow_async(
             request=RunWorkflowRequest(workflow_id=workflow_id),
         )
+        if response.job_information:
+            ctx.request_context.lifespan_context.jobs.track(response.job_information)
         return f"Workflow execution initiated: {response.raw_response}"
     except Exception as e:
+        record_failure()
         return f"Error running workflow: {str(e)}"
 
 
+@mcp.tool()
+async def run_workflows(
+    ctx: Context,
+    workflow_ids: Optional[list[str]] = None,
+    source_id: Optional[str] = None,
+    destination_id: Optional[str] = None,
+) -> str:
+    """Run several workflows concurrently.
+
+    Either workflow_ids or at least one of source_id and destination_id must be given. With
+    only the filters, every workflow connected to that source and/or destination is run.
+
+    Args:
+        workflow_ids: Optional IDs of the workflows to run
+        source_id: Optional source connector ID selecting the workflows to run
+        destination_id: Optional destination connector ID selecting the workflows to run
+
+    Returns:
+        String containing a table of workflow IDs with their job IDs or errors
+    """
+    client = ctx.request_context.lifespan_context.client
+
+    if not workflow_ids:
+        if not source_id and not destination_id:
+            return "Provide workflow_ids or a source_id/destination_id filter to select workflows"
+        try:
+            response = await client.workflows.list_workflows_async(
+                request=ListWorkflowsRequest(destination_id=destination_id, source_id=source_id),
+            )
+        except Exception as e:
+            record_failure()
+            return f"Error listing workflows: {str(e)}"
+        workflow_ids = [workflow.id for workflow in response.response_list_workflows]
+
+    if not workflow_ids:
+        return "No workflows found"
+
+    jobs = ctx.request_context.lifespan_context.jobs
+
+    async def run(workflow_id: str) -> str:
+        response = await client.workflows.run_workflow_async(
+            request=RunWorkflowRequest(workflow_id=workflow_id),
+        )
+        if not response.job_information:
+            return "-"
+        jobs.track(response.job_information)
+        return response.job_information.id
+
+    results = await gather_bounded(run, workflow_ids, limit=MAX_CONCURRENT_REQUESTS)
+
+    failed = sum(isinstance(outcome, Exception) for _, outcome in results)
+    if failed:
+        record_failure()
+    result = [f"Triggered {len(results) - failed} of {len(results)} workflows:"]
+    result.append("Workflow ID | Job ID | Error")
+    for workflow_id, outcome in results:
+        if isinstance(outcome, Exception):
+            result.append(f"{workflow_id} | - | {str(outcome)}")
+        else:
+            result.append(f"{workflow_id} | {outcome} | -")
+
+    return "\n".join(result)
+
+
 @mcp.prompt()
 async def prompt_run_workflow(
     workflow_id: str
@@ -495,10 +919,12 @@ async def update_workflow(
         response = await client.workflows.update_workflow_async(
             request=UpdateWorkflowRequest(workflow_id=workflow_id, update_workflow=workflow),
         )
+        invalidate_listing_cache(ctx)
 
         info = response.workflow_information
         return await get_workflow_info(ctx, info.id)
     except Exception as e:
+        record_failure()
         return f"Error updating workflow: {str(e)}"
 
 
@@ -518,8 +944,10 @@ async def delete_workflow(ctx: Context, workflow_id: str) -> str:
         response = await client.workflows.delete_workflow_async(
             request=DeleteWorkflowRequest(workflow_id=workflow_id),
         )
+        invalidate_listing_cache(ctx)
         return f"Workflow deleted successfully: {response.raw_response}"
     except Exception as e:
+        record_failure()
         return f"Error deleting workflow: {str(e)}"
 
 
@@ -528,63 +956,108 @@ async def list_jobs(
     ctx: Context,
     workflow_id: Optional[str] = None,
     status: Optional[str] = None,
+    refresh: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
 ) -> str:
     """
     List jobs via the Unstructured API.
 
+    Job states are served from the server's job tracker, which keeps polling unfinished jobs
+    in the background.
+
     Args:
         workflow_id: Optional workflow ID to filter by
         status: Optional job status to filter by
+        refresh: Optional flag to re-list the jobs from the Unstructured API first
+        limit: Optional maximum number of jobs to return; the most recent ones are selected
+        offset: Optional number of most recent jobs to skip before applying the limit
+        created_after: Optional ISO 8601 date; only jobs created at or after it are returned
+        created_before: Optional ISO 8601 date; only jobs created before it are returned
 
     Returns:
         String containing the list of jobs
     """
-    client = ctx.request_context.lifespan_context.client
+    jobs = ctx.request_context.lifespan_context.jobs
 
-    request = ListJobsRequest(workflow_id=workflow_id, status=status)
+    error = validate_window(limit, offset)
+    if error:
+        return error
+    try:
+        after = parse_datetime(created_after) if created_after else None
+        before = parse_datetime(created_before) if created_before else None
+    except ValueError as e:
+        return str(e)
 
+    job_status = None
     if status:
         try:
-            request.status = JobStatus[status]
+            job_status = JobStatus[status]
         except KeyError:
             return f"Invalid job status: {status}"
 
-    response = await client.jobs.list_jobs_async(request=request)
+    tracked_jobs = await jobs.list_jobs(workflow_id=workflow_id, status=job_status, refresh=refresh)
+    matching_jobs = filter_created(tracked_jobs, created_after=after, created_before=before)
 
-    # Sort jobs by name
-    sorted_jobs = sorted(
-        response.response_list_jobs,
+    if not matching_jobs:
+        return "No Jobs found"
+
+    # Select the most recent jobs, listed by created time
+    selected_jobs = top_k(
+        matching_jobs,
         key=lambda job: job.created_at,
+        limit=limit,
+        offset=offset,
+        largest=True,
     )
 
-    if not sorted_jobs:
-        return "No Jobs found"
-
     # Format response
     result = ["Available Jobs by created time:"]
-    for job in sorted_jobs:
+    for job in selected_jobs:
         result.append(f"- JOB ID: {job.id}")
 
+    footer = describe_window(len(selected_jobs), len(matching_jobs), offset)
+    if footer:
+        result.append(footer)
+
     return "\n".join(result)
 
 
 @mcp.tool()
-async def get_job_info(ctx: Context, job_id: str) -> str:
+async def get_job_info(
+    ctx: Context,
+    job_id: str,
+    refresh: bool = False,
+    projection: str = "summary",
+) -> str:
     """Get detailed information about a specific job.
 
     Args:
         job_id: ID of the job to get information for
+        refresh: Optional flag to fetch the job from the Unstructured API instead of the
+            server's job tracker
+        projection: Optional amount of detail: "summary" (default) for the status, runtime
+            and per-node output file counts, "full" for the whole raw job document, or a comma
+            separated list of job fields to include in the raw result, e.g. "status,runtime"
 
     Returns:
         String containing the job information
     """
-    client = ctx.request_context.lifespan_context.client
-
-    response = await client.jobs.get_job_async(
-        request=GetJobRequest(job_id=job_id),
-    )
+    jobs = ctx.request_context.lifespan_context.jobs
+
+    fields = None
+    if projection not in ("summary", "full"):
+        fields = [field.strip() for field in projection.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in JobInformation.model_fields]
+        if unknown or not fields:
+            return (
+                f"Invalid projection: {projection}. Use summary, full or a comma separated list "
+                f"of: {', '.join(JobInformation.model_fields)}"
+            )
 
-    info = response.job_information
+    info = await jobs.get_job(job_id, refresh=refresh)
 
     result = ["Job Information:"]
     result.append(f"Created at: {info.created_at}")
@@ -593,7 +1066,118 @@ async def get_job_info(ctx: Context, job_id: str) -> str:
     result.append(f"Workflow name: {info.workflow_name}")
     result.append(f"Workflow id: {info.workflow_id}")
     result.append(f"Runtime: {info.runtime}")
-    result.append(f"Raw result: {json.dumps(json.loads(info.json()), indent=2)}")
+
+    if projection == "summary":
+        input_file_ids = info.input_file_ids or []
+        output_node_files = info.output_node_files or []
+        result.append(f"Input files: {len(input_file_ids)}")
+        result.append("Output files per node:")
+        for node_id, count in Counter(node_file.node_id for node_file in output_node_files).items():
+            result.append(f"  - {node_id}: {count}")
+    elif projection == "full":
+        # Single compact serialization pass instead of dump, parse and re-indent
+        result.append(f"Raw result: {info.model_dump_json()}")
+    else:
+        # Optional fields the API did not return are left out instead of dumping a sentinel
+        projected = {
+            field: value
+            for field in fields
+            if field in info.model_fields_set and (value := getattr(info, field)) is not None
+        }
+        result.append(f"Raw result: {pydantic_core.to_json(projected).decode()}")
+
+    return "\n".join(result)
+
+
+@mcp.tool()
+async def wait_for_jobs(
+    ctx: Context,
+    job_ids: list[str],
+    timeout_seconds: float = 600,
+    poll_interval_seconds: float = 2,
+    max_poll_interval_seconds: float = 30,
+) -> str:
+    """Wait until jobs finish, polling the Unstructured API from the server.
+
+    Jobs are polled with exponential backoff and jitter, and a progress notification is sent
+    every time another job reaches a terminal status (COMPLETED, STOPPED or FAILED). A job the
+    API rejects, e.g. an unknown job ID, is reported right away instead of polled until the
+    timeout; server errors and timeouts are retried.
+
+    Args:
+        job_ids: IDs of the jobs to wait for
+        timeout_seconds: Maximum time to wait before returning the current statuses
+        poll_interval_seconds: Delay before the first re-poll, doubled after every poll; at
+            least 0.5 seconds
+        max_poll_interval_seconds: Upper bound for the delay between polls, at least
+            poll_interval_seconds
+
+    Returns:
+        String containing the final status of each job and whether the wait timed out
+    """
+    client = ctx.request_context.lifespan_context.client
+    jobs = ctx.request_context.lifespan_context.jobs
+
+    job_ids = list(dict.fromkeys(job_ids))
+    if not job_ids:
+        return "No job IDs given"
+    if timeout_seconds <= 0:
+        return f"Invalid timeout_seconds: {timeout_seconds}, must be positive"
+    # A zero or negative interval would poll the API in a tight loop until the timeout
+    poll_interval_seconds = max(poll_interval_seconds, MIN_JOB_POLL_INTERVAL_SECONDS)
+    max_poll_interval_seconds = max(max_poll_interval_seconds, poll_interval_seconds)
+
+    statuses: dict[str, str] = {job_id: "UNKNOWN" for job_id in job_ids}
+    runtimes: dict[str, Optional[str]] = {}
+    pending = set(job_ids)
+    rejected: set[str] = set()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_seconds
+    attempt = 0
+
+    async def poll(job_id: str):
+        response = await client.jobs.get_job_async(request=GetJobRequest(job_id=job_id))
+        return response.job_information
+
+    while True:
+        for job_id, outcome in await gather_bounded(poll, pending, limit=MAX_CONCURRENT_REQUESTS):
+            if isinstance(outcome, Exception):
+                if is_client_error(outcome):
+                    statuses[job_id] = f"ERROR ({str(outcome)})"
+                    rejected.add(job_id)
+                    pending.discard(job_id)
+                    continue
+                # Keep waiting on transient errors, the last one is reported if it persists
+                statuses[job_id] = f"UNKNOWN (last error: {str(outcome)})"
+                continue
+            jobs.track(outcome)
+            statuses[job_id] = outcome.status.value
+            runtimes[job_id] = outcome.runtime
+            if outcome.status in TERMINAL_JOB_STATUSES:
+                pending.discard(job_id)
+
+        await ctx.report_progress(len(job_ids) - len(pending), len(job_ids))
+
+        remaining = deadline - loop.time()
+        if not pending or remaining <= 0:
+            break
+
+        delay = backoff_delay(attempt, poll_interval_seconds, max_poll_interval_seconds)
+        # The jitter may take the delay below the floor
+        delay = max(delay, MIN_JOB_POLL_INTERVAL_SECONDS)
+        await asyncio.sleep(min(delay, remaining))
+        attempt += 1
+
+    if pending:
+        result = [f"Timed out after {timeout_seconds}s with {len(pending)} job(s) still running:"]
+    elif rejected:
+        result = [f"Finished waiting, {len(rejected)} job(s) could not be polled:"]
+    else:
+        result = ["All jobs finished:"]
+    for job_id in job_ids:
+        runtime = runtimes.get(job_id)
+        suffix = f" (runtime: {runtime})" if runtime else ""
+        result.append(f"- JOB ID: {job_id} Status: {statuses[job_id]}{suffix}")
 
     return "\n".join(result)
 
@@ -614,41 +1198,49 @@ async def cancel_job(ctx: Context, job_id: str) -> str:
         response = await client.jobs.cancel_job_async(
             request=CancelJobRequest(job_id=job_id),
         )
+        ctx.request_context.lifespan_context.jobs.wake()
         return f"Job canceled successfully: {response.raw_response}"
     except Exception as e:
+        record_failure()
         return f"Error canceling job: {str(e)}"
 
 
-@mcp.resource("invoices://vendor")
-def vendor_bills():
+async def _vendor_bills_page(page_size: Optional[int] = None, cursor: Optional[str] = None) -> dict:
     try:
 
         index_name = "search-text-index"
 
-        invoice_data_collection = get_mongodb_connection()
-
-        result = invoice_data_collection.aggregate([
-            {
-                "$search": {
-                    "index": index_name,
-                    "text": {
-                        "query": ["from", "by"],
-                        "path": "text"
+        mirror = get_invoice_mirror()
+        if mirror is not None:
+            results, next_cursor = await asyncio.to_thread(
+                mirror.search_page, fts_any("from", "by"), page_size, cursor
+            )
+        else:
+            mongo = get_mongodb_connection()
+
+            results, next_cursor = await mongo.aggregate_page(
+                [
+                    {
+                        "$search": {
+                            "index": index_name,
+                            "text": {
+                                "query": ["from", "by"],
+                                "path": "text"
+                            }
+                        }
                     }
-                }
-            },
-            {
-                "$project": {
-                    "text": 1,
-                    "_id": 0
-                }
-            }
-        ])
-        results = list(result)
+                ],
+                projection={"text": 1, "_id": 0},
+                page_size=page_size,
+                cursor=cursor,
+            )
         return {
             "metadata": {
                 "resource": "invoices://vendor",
-                "description": "all vendor bills"
+                "description": "all vendor bills",
+                "count": len(results),
+                # Pass this to get_vendor_bills_page to fetch the next page
+                "next_cursor": next_cursor,
             },
             "data": results,
             "analysis_prompt": f"""
@@ -659,6 +1251,7 @@ def vendor_bills():
         }
         
     except Exception as e:
+        record_failure()
         return {
             "error": str(e),
             "metadata": {
@@ -668,43 +1261,295 @@ def vendor_bills():
         }
 
 
-@mcp.resource("invoices://vendor/year")
-def get_vendor_bills_by_year():
-    try:
-        
-        ## Please edit these variables below to your choice
+def _invoice_response_budget() -> Optional[int]:
+    """Character budget of the invoice resources, or None when they return whole chunks."""
+    return budget_chars(
+        max_chars=env_int("INVOICE_RESPONSE_MAX_CHARS", 0),
+        max_tokens=env_int("INVOICE_RESPONSE_MAX_TOKENS", 0),
+    )
 
-        year = "2024"
-        index_name = "search-text-index"
 
-        invoice_data_collection = get_mongodb_connection()
+def _budgeted(query: InvoiceQuery, budget: Optional[int]) -> InvoiceQuery:
+    """Ask for ranked passages, and no more results than can fit, when there is a budget."""
+    if budget is None:
+        return query
+    limit = budget_limit(budget)
+    if query.limit is not None:
+        limit = min(limit, query.limit)
+    return replace(query, highlights=True, limit=limit)
 
-        result = invoice_data_collection.aggregate([
-            {
-                "$search": {
-                    "index": index_name,
-                    "compound": {  # Requires ALL terms to match
-                        "must": [
-                            { "text": { "query": year, "path": "text" } },
-                            { "text": { "query": ["from", "by"], "path": "text" } }
-                        ]
-                    }
-                }
-            },
-            {
-                "$project": {
-                    "text": 1,
-                    "_id": 0
-                }
+
+def _fit_invoice_results(
+    results: list[dict], budget: Optional[int], metadata: dict, limit: Optional[int] = None
+) -> list[dict]:
+    """Trim ranked passages to the budget and record what was left out in the metadata.
+
+    `dropped` counts the fetched results that did not fit; `more_results` tells whether the
+    search stopped at its `limit`, so that further bills may match.
+    """
+    if budget is None:
+        return results
+    kept, dropped = fit_to_budget(results, budget)
+    metadata["budget_chars"] = budget
+    metadata["count"] = len(kept)
+    metadata["dropped"] = dropped
+    metadata["more_results"] = limit is not None and len(results) >= limit
+    return kept
+
+
+@mcp.resource("invoices://vendor")
+async def vendor_bills():
+    budget = _invoice_response_budget()
+    if budget is None:
+        return await _vendor_bills_page()
+
+    try:
+        # Ranked passages under a budget replace the first page of whole chunks; the full
+        # text stays available through get_vendor_bills_page
+        query = _budgeted(InvoiceQuery(), budget)
+        results = await _search_invoices(query)
+        metadata = {"resource": "invoices://vendor", "description": "all vendor bills"}
+        return {
+            "metadata": metadata,
+            "data": _fit_invoice_results(results, budget, metadata, query.limit),
+            "analysis_prompt": f"""
+                Analyze these passages of vendor bills and provide:
+                1. Total amount spent on each vendor
+                2. Total number of purchases from each vendor
+            """
+        }
+    except Exception as e:
+        record_failure()
+        return {
+            "error": str(e),
+            "metadata": {
+                "resource": "invoices://vendor",
+                "status": "failed"
             }
-        ])
-        results = list(result)
+        }
+
+
+@mcp.tool()
+async def get_vendor_bills_page(
+    ctx: Context,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """Get one page of vendor bills, the paginated form of the invoices://vendor resource.
+
+    Args:
+        page_size: Optional maximum number of bills to return, defaults to MONGO_DB_PAGE_SIZE
+        cursor: Optional continuation token from the next_cursor of a previous page
+
+    Returns:
+        Dictionary containing the bills of this page and the next_cursor, which is null on
+        the last page
+    """
+    return await _vendor_bills_page(page_size=page_size, cursor=cursor)
+
+
+@mcp.tool()
+async def sync_invoice_mirror(ctx: Context, rebuild: bool = False) -> str:
+    """Sync the local invoice search mirror with the MongoDB destination collection now.
+
+    Args:
+        rebuild: Optional flag to drop the local copy and sync every document again
+
+    Returns:
+        String containing the number of synced chunks
+    """
+    lifespan_context = ctx.request_context.lifespan_context
+    mirror = lifespan_context.mirror
+    mongo = lifespan_context.mongo
+    if mirror is None:
+        return "The invoice mirror is disabled, set INVOICE_MIRROR_PATH to enable it"
+    if mongo is None:
+        record_failure()
+        return "Missing MongoDB environment variables"
+
+    try:
+        synced = await mongo.run(mirror.sync, mongo.collection, rebuild=rebuild)
+        lifespan_context.invoice_cache.clear()
+        total = await asyncio.to_thread(mirror.count)
+        return f"Synced {synced} invoice chunks, {total} chunks in the mirror"
+    except Exception as e:
+        record_failure()
+        return f"Error syncing invoice mirror: {str(e)}"
+
+
+@mcp.resource("invoices://vendor/totals")
+async def get_vendor_totals():
+    try:
+
+        mongo = get_mongodb_connection()
+
+        # The fields are extracted in the background whenever the invoice collection changes
+        results = await mongo.aggregate(VENDOR_TOTALS_PIPELINE, collection=mongo.invoices)
+
         return {
             "metadata": {
-                "resource": "invoices://vendor/year",
-                "description": f"vendor bills paid for in {year}"
+                "resource": "invoices://vendor/totals",
+                "description": "total amount and number of invoices per vendor and currency"
             },
-            "data": results,
+            "data": [to_plain_row(row) for row in results],
+            "analysis_prompt": f"""
+                These totals were computed from the invoice fields extracted from every bill.
+                Summarize the spend per vendor and point out the largest vendors.
+            """
+        }
+
+    except Exception as e:
+        record_failure()
+        return {
+            "error": str(e),
+            "metadata": {
+                "resource": "invoices://vendor/totals",
+                "status": "failed"
+            }
+        }
+
+
+@mcp.tool()
+async def extract_invoices(ctx: Context, reextract: bool = False) -> str:
+    """Parse vendor, invoice number, date, currency and amount out of the stored invoice chunks.
+
+    The fields are saved in a separate collection, next to the destination collection, and feed
+    the invoices://vendor/totals resource and the amount filters of search_vendor_bills. The
+    server already parses new chunks whenever the collection changes; call this to catch up
+    right away, or with reextract after the extraction rules changed. Only chunks without
+    extracted fields are parsed unless reextract is set.
+
+    Args:
+        reextract: Optional flag to parse every chunk again
+
+    Returns:
+        String containing the number of parsed chunks
+    """
+    mongo = ctx.request_context.lifespan_context.mongo
+    if mongo is None:
+        record_failure()
+        return "Missing MongoDB environment variables"
+
+    try:
+        scanned, parsed = await mongo.run(
+            extract_and_store, mongo.collection, mongo.invoices, reextract=reextract
+        )
+        ctx.request_context.lifespan_context.invoice_cache.clear()
+        return f"Parsed {scanned} invoice chunks, {parsed} with a vendor and an amount"
+    except Exception as e:
+        record_failure()
+        return f"Error extracting invoice fields: {str(e)}"
+
+
+async def _search_invoices(query: InvoiceQuery) -> list[dict]:
+    """Run an invoice search, memoized per parameter combination for a short TTL."""
+    lifespan_context = mcp.get_context().request_context.lifespan_context
+    cache = lifespan_context.invoice_cache
+    results = cache.get(query)
+    if results is not None:
+        return results
+    generation = cache.generation
+
+    mirror = lifespan_context.mirror
+    if mirror is not None and not query.has_amount_filter:
+        search = mirror.search_passages if query.highlights else mirror.search
+        results = await asyncio.to_thread(search, build_fts_expression(query), query.limit)
+    else:
+        mongo = get_mongodb_connection()
+        results = await mongo.aggregate(
+            build_pipeline(query, invoice_collection=mongo.invoices.name)
+        )
+        if query.highlights:
+            results = [
+                {"passages": atlas_passages(row.get("highlights", [])), "score": row.get("score")}
+                for row in results
+            ]
+
+    cache.set(query, results, generation)
+    return results
+
+
+@mcp.tool()
+async def search_vendor_bills(
+    ctx: Context,
+    vendor: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    service: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    limit: int = 100,
+    max_tokens: Optional[int] = None,
+) -> dict:
+    """Search vendor bills by vendor, year range, service and amount range.
+
+    Args:
+        vendor: Optional vendor name to match as a phrase
+        year_from: Optional first year of the range, e.g. 2023; used alone it selects one year
+        year_to: Optional last year of the range, inclusive
+        service: Optional service to match, e.g. design
+        min_amount: Optional minimum invoice amount, uses the fields from extract_invoices
+        max_amount: Optional maximum invoice amount, uses the fields from extract_invoices
+        limit: Optional maximum number of bills to return, defaults to 100
+        max_tokens: Optional response budget; when set only the matched passages of the best
+            ranked bills are returned, up to roughly this many tokens. Defaults to the
+            INVOICE_RESPONSE_MAX_TOKENS / INVOICE_RESPONSE_MAX_CHARS budget, if any
+
+    Returns:
+        Dictionary containing the matching bills, and with a budget the number of bills dropped
+    """
+    if max_tokens is not None and max_tokens < 1:
+        return {
+            "error": f"Invalid max_tokens: {max_tokens}, must be at least 1",
+            "metadata": {"tool": "search_vendor_bills", "status": "failed"},
+        }
+    budget = budget_chars(max_tokens=max_tokens) if max_tokens else _invoice_response_budget()
+
+    query = InvoiceQuery(
+        vendor=vendor,
+        year_from=year_from,
+        year_to=year_to,
+        service=service,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        limit=limit,
+    )
+    error = query.validate()
+    if error:
+        return {"error": error, "metadata": {"tool": "search_vendor_bills", "status": "failed"}}
+
+    try:
+        query = _budgeted(query, budget)
+        results = await _search_invoices(query)
+        metadata = {
+            "tool": "search_vendor_bills",
+            "query": asdict(query),
+            "count": len(results),
+        }
+        data = _fit_invoice_results(results, budget, metadata, query.limit)
+        return {"metadata": metadata, "data": data}
+    except Exception as e:
+        record_failure()
+        return {"error": str(e), "metadata": {"tool": "search_vendor_bills", "status": "failed"}}
+
+
+@mcp.resource("invoices://vendor/year")
+async def get_vendor_bills_by_year():
+    try:
+
+        # Set INVOICE_DEFAULT_YEAR to change the year, or use the search_vendor_bills tool
+        year = env_int("INVOICE_DEFAULT_YEAR", 2024)
+
+        budget = _invoice_response_budget()
+        query = _budgeted(InvoiceQuery(year_from=year), budget)
+        results = await _search_invoices(query)
+        metadata = {
+            "resource": "invoices://vendor/year",
+            "description": f"vendor bills paid for in {year}"
+        }
+        return {
+            "metadata": metadata,
+            "data": _fit_invoice_results(results, budget, metadata, query.limit),
             "analysis_prompt": f"""
                 Analyze these vendor invoices and provide:
                 1. Vendor bills due in {year}
@@ -713,6 +1558,7 @@ def get_vendor_bills_by_year():
         }
         
     except Exception as e:
+        record_failure()
         return {
             "error": str(e),
             "metadata": {
@@ -723,42 +1569,22 @@ def get_vendor_bills_by_year():
 
 
 @mcp.resource("invoices://vendor/service")
-def get_vendor_by_service():
+async def get_vendor_by_service():
     try:
-        
-        ## Please edit these variables below to your choice
-
-        service = "design"
-        index_name = "search-text-index"
 
-        invoice_data_collection = get_mongodb_connection()
+        # Set INVOICE_DEFAULT_SERVICE to change the service, or use the search_vendor_bills tool
+        service = env_str("INVOICE_DEFAULT_SERVICE", "design")
 
-        result = invoice_data_collection.aggregate([
-            {
-                "$search": {
-                    "index": index_name,
-                    "compound": {  # Requires ALL terms to match
-                        "must": [
-                            { "text": { "query": service, "path": "text" } },
-                            { "text": { "query": ["from", "by"], "path": "text" } }
-                        ]
-                    }
-                }
-            },
-            {
-                "$project": {
-                    "text": 1,
-                    "_id": 0
-                }
-            }
-        ])
-        results = list(result)
+        budget = _invoice_response_budget()
+        query = _budgeted(InvoiceQuery(service=service), budget)
+        results = await _search_invoices(query)
+        metadata = {
+            "resource": "invoices://vendor/service",
+            "description": f"vendor services"
+        }
         return {
-            "metadata": {
-                "resource": "invoices://vendor/service",
-                "description": f"vendor services"
-            },
-            "data": results,
+            "metadata": metadata,
+            "data": _fit_invoice_results(results, budget, metadata, query.limit),
             "analysis_prompt": f"""
                 Analyze these vendor bill services and provide:
                 1. Total amount spent on {service} services
@@ -767,6 +1593,7 @@ def get_vendor_by_service():
         }
         
     except Exception as e:
+        record_failure()
         return {
             "error": str(e),
             "metadata": {
@@ -777,28 +1604,76 @@ def get_vendor_by_service():
 
 
 
-def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
-    """Create a Starlette application that can server the provied mcp server with SSE."""
-    sse = SseServerTransport("/messages/")
-
-    async def handle_sse(request: Request) -> None:
-        async with sse.connect_sse(
-            request.scope,
-            request.receive,
-            request._send,  # noqa: SLF001
-        ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options(),
-            )
+def create_starlette_app(
+    mcp_server: Server, *, debug: bool = False, transport: str = "sse"
+) -> Starlette:
+    """Create a Starlette application that can server the provied mcp server with SSE.
 
-    return Starlette(
-        debug=debug,
-        routes=[
+    With `transport="http"` the server is served statelessly on `/mcp` instead, so that
+    several workers or replicas can share the load.
+    """
+    sse = SseServerTransport("/messages/")
+    session_store = session_store_from_env() if transport == "http" else None
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        global shared_app_context
+        async with create_app_context() as context:
+            shared_app_context = context
+            try:
+                yield
+            finally:
+                shared_app_context = None
+                if hasattr(session_store, "close"):
+                    session_store.close()
+
+    async def handle_sse(request: Request) -> Optional[Response]:
+        if admission is not None and not admission.open_session():
+            return Response("Too many sessions", status_code=503, headers={"retry-after": "5"})
+        try:
+            with anyio.CancelScope() as cancel_scope:
+                # The server would otherwise keep the session of a closed stream open forever,
+                # holding its memory and, with MCP_MAX_SESSIONS, one of the session slots
+                async def receive_until_disconnect():
+                    message = await request.receive()
+                    if message["type"] == "http.disconnect":
+                        cancel_scope.cancel()
+                    return message
+
+                async with sse.connect_sse(
+                    request.scope,
+                    receive_until_disconnect,
+                    request._send,  # noqa: SLF001
+                ) as (read_stream, write_stream):
+                    await mcp_server.run(
+                        read_stream,
+                        write_stream,
+                        mcp_server.create_initialization_options(),
+                    )
+        finally:
+            if admission is not None:
+                admission.close_session()
+
+    if transport == "http":
+        stateless = StatelessHttpTransport(
+            mcp_server, session_store, lifespan_context=lambda: shared_app_context
+        )
+        routes = [Route("/mcp", endpoint=stateless.endpoint, methods=["GET", "POST", "DELETE"])]
+    else:
+        routes = [
             Route("/sse", endpoint=handle_sse),
             Mount("/messages/", app=sse.handle_post_message),
-        ],
+        ]
+    if metrics is not None:
+        routes.append(Route("/metrics", endpoint=metrics.endpoint))
+
+    return Starlette(debug=debug, routes=routes, lifespan=lifespan)
+
+
+def create_app() -> Starlette:
+    """App factory run by each uvicorn worker; the transport comes from `MCP_TRANSPORT`."""
+    return create_starlette_app(
+        mcp._mcp_server, debug=True, transport=env_str("MCP_TRANSPORT", "sse")  # noqa: WPS437
     )
 
 
@@ -808,19 +1683,47 @@ if __name__ == "__main__":
         # server is directly being invoked from client
         mcp.run()
     else:
-        # server is running as HTTP SSE server
+        # server is running as HTTP SSE server, or stateless HTTP server
         # reference: https://github.com/sidharthrajaram/mcp-sse
-        mcp_server = mcp._mcp_server  # noqa: WPS437
-
         import argparse
 
         parser = argparse.ArgumentParser(description="Run MCP SSE-based server")
         parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
         parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+        parser.add_argument(
+            "--transport",
+            choices=["sse", "http"],
+            default="sse",
+            help="SSE on /sse, or stateless HTTP on /mcp, which can run on several workers",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Number of worker processes (http only)"
+        )
         args = parser.parse_args()
-
-        # Bind SSE request handling to MCP server
-        starlette_app = create_starlette_app(mcp_server, debug=True)
-
-        uvicorn.run(starlette_app, host=args.host, port=args.port)
+        if args.workers > 1 and args.transport != "http":
+            parser.error("--workers needs --transport http, SSE sessions live in one process")
+
+        # The workers read their settings from the environment they inherit
+        os.environ["MCP_TRANSPORT"] = args.transport
+        if args.workers > 1 and not env_str("MCP_SESSION_DB"):
+            # The workers have to see each other's sessions
+            os.environ["MCP_SESSION_DB"] = os.path.join(
+                tempfile.gettempdir(), f"uns-mcp-sessions-{args.port}.db"
+            )
+        if args.workers > 1:
+            # Every worker has its own listing and invoice caches, and a write handled by one
+            # worker cannot clear those of the others; keep them off unless configured
+            for name in ("UNSTRUCTURED_LIST_CACHE_TTL_SECONDS", "INVOICE_QUERY_CACHE_TTL_SECONDS"):
+                os.environ.setdefault(name, "0")
+
+        if args.workers > 1:
+            uvicorn.run(
+                "server:create_app",
+                factory=True,
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+            )
+        else:
+            uvicorn.run(create_app(), host=args.host, port=args.port)
 
@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to a default."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got: {value}")
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment, falling back to a default."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be a number, got: {value}")
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment, falling back to a default."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting from the environment, treating empty values as unset."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Tuple, TypeVar
+
+import httpx
+
+from metrics import Counter
+from resilience import endpoint_group
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers asking for the same key.
+
+    The call runs as its own task, so a caller that gives up (a cancelled tool call) does not
+    cancel it for the others waiting on it. Nothing is kept once the call completes; caching
+    results is left to the TTL caches.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Return the result of `fn()` and whether it was shared with an earlier caller."""
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def detach(self) -> None:
+        """Make later callers start new calls; callers already waiting still get their results."""
+        self._calls.clear()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller was cancelled before it
+            task.exception()
+
+
+class RequestCoalescer:
+    """Send identical concurrent GET requests to the Unstructured API only once.
+
+    Requests are identical when their URL, which carries the operation and its arguments,
+    and their headers, which carry the API key, are equal. Every caller gets its own response
+    built from the one body read upstream. The in-flight table is shared by all sessions, so
+    dashboards or agents polling the same job in parallel cost a single request.
+    """
+
+    def __init__(self):
+        self.flights = SingleFlight()
+        self.coalesced = Counter(
+            "mcp_upstream_coalesced_total",
+            "Unstructured API GET requests answered by an identical request already in flight",
+            ("group",),
+        )
+
+    def counters(self) -> list[Counter]:
+        return [self.coalesced]
+
+    def transport(self, transport: httpx.AsyncBaseTransport) -> "CoalescingTransport":
+        """Wrap the transport of an HTTP client with this coalescing."""
+        return CoalescingTransport(transport, self)
+
+
+class CoalescingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, coalescer: RequestCoalescer):
+        self.transport = transport
+        self.coalescer = coalescer
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            try:
+                return await self.transport.handle_async_request(request)
+            finally:
+                # A read started before this write may return the old state, so reads that
+                # follow the write must not join it
+                self.coalescer.flights.detach()
+        key = (str(request.url), tuple(sorted(request.headers.multi_items())))
+        (status_code, headers, body, extensions), shared = await self.coalescer.flights.do(
+            key, lambda: self._fetch(request)
+        )
+        if shared:
+            self.coalescer.coalesced.inc(endpoint_group(request.url))
+        return httpx.Response(
+            status_code,
+            headers=headers,
+            stream=httpx.ByteStream(body),
+            request=request,
+            extensions=extensions,
+        )
+
+    async def _fetch(self, request: httpx.Request) -> tuple:
+        response = await self.transport.handle_async_request(request)
+        try:
+            # Raw bytes: the client of each caller decodes them according to the headers
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        # The network stream of the connection is not passed on, it goes back to the pool
+        extensions = {
+            name: value
+            for name, value in response.extensions.items()
+            if name in ("http_version", "reason_phrase")
+        }
+        return response.status_code, response.headers.multi_items(), body, extensions
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import typing
+import uuid
+from typing import Any, Callable, Optional, Protocol
+
+import pydantic
+from mcp import types
+from mcp.server import Server
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.shared.exceptions import McpError
+from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from admission import SERVER_BUSY
+from settings import env_float, env_str
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "mcp-session-id"
+# Resource subscriptions need a channel back to the client, which plain responses don't have
+UNSUPPORTED_REQUESTS = (types.SubscribeRequest, types.UnsubscribeRequest)
+
+
+class SessionStore(Protocol):
+    """Where the stateless transport keeps what a session needs across requests and workers."""
+
+    def get(self, session_id: str) -> Optional[dict]: ...
+
+    def put(self, session_id: str, data: dict) -> None: ...
+
+    def delete(self, session_id: str) -> None: ...
+
+
+class MemorySessionStore:
+    """Sessions of a single process, lost on restart."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._sessions: dict[str, tuple[float, dict]] = {}
+
+    def get(self, session_id: str) -> Optional[dict]:
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._sessions.pop(session_id, None)
+            return None
+        self._sessions[session_id] = (time.monotonic() + self.ttl, entry[1])
+        return entry[1]
+
+    def put(self, session_id: str, data: dict) -> None:
+        now = time.monotonic()
+        self._sessions = {key: entry for key, entry in self._sessions.items() if entry[0] > now}
+        self._sessions[session_id] = (now + self.ttl, data)
+
+    def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SqliteSessionStore:
+    """Sessions in a SQLite file, shared by the uvicorn workers of one host.
+
+    It stands in for a networked store such as Redis when running replicas on several hosts.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mcp_sessions "
+                "(id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM mcp_sessions WHERE id = ? AND expires_at > ?",
+                (session_id, now),
+            ).fetchone()
+            # Writing on every request would serialize the workers on the database lock, so the
+            # expiry is only pushed back once half of the TTL has gone by
+            if row is not None and row[1] - now < self.ttl / 2:
+                self._conn.execute(
+                    "UPDATE mcp_sessions SET expires_at = ? WHERE id = ?",
+                    (now + self.ttl, session_id),
+                )
+                self._conn.commit()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, session_id: str, data: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM mcp_sessions WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mcp_sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), now + self.ttl),
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM mcp_sessions WHERE id = ?", (session_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class StatelessSession:
+    """Stands in for the `ServerSession` of a request handled over the stateless transport.
+
+    Handlers can read the client parameters given at initialization. Messages the server
+    would push to the client (progress, logs, resource updates) are dropped: a plain HTTP
+    response carries only the result.
+    """
+
+    def __init__(self, session_id: str, client_params: types.InitializeRequestParams):
+        self.session_id = session_id
+        self.client_params = client_params
+
+    def check_client_capability(self, capability: types.ClientCapabilities) -> bool:
+        return False
+
+    def __getattr__(self, name: str) -> Callable:
+        if not name.startswith("send_"):
+            raise AttributeError(name)
+
+        async def drop(*args: Any, **kwargs: Any) -> None:
+            logger.debug(f"Dropped {name} on the stateless HTTP transport")
+
+        return drop
+
+
+class StatelessHttpTransport:
+    """MCP over plain HTTP POST, with no state kept in the process between requests.
+
+    Each POST to the endpoint carries one JSON-RPC message, or a batch, and gets the results
+    as a JSON response. `initialize` creates a session whose client parameters are kept in
+    `store` and returns its id in the `Mcp-Session-Id` header, which later requests send back.
+    Any worker or replica sharing the store can therefore answer any request, unlike SSE where
+    the POSTs of a session must reach the process holding its stream.
+
+    Args:
+        mcp_server: The low-level server whose handlers answer the requests
+        store: Where sessions are kept
+        lifespan_context: Returns the app context shared by the requests of this process
+    """
+
+    def __init__(
+        self,
+        mcp_server: Server,
+        store: SessionStore,
+        lifespan_context: Callable[[], Any],
+    ):
+        self.mcp_server = mcp_server
+        self.store = store
+        self.lifespan_context = lifespan_context
+        self._request_types = {
+            typing.get_args(request_type.model_fields["method"].annotation)[0]: request_type
+            for request_type in mcp_server.request_handlers
+        }
+
+    async def endpoint(self, request: Request) -> Response:
+        if request.method == "DELETE":
+            session_id = request.headers.get(SESSION_HEADER)
+            if session_id:
+                await asyncio.to_thread(self.store.delete, session_id)
+            return Response(status_code=204)
+        if request.method != "POST":
+            # There is no server-initiated stream to open with GET
+            return Response(status_code=405, headers={"allow": "POST, DELETE"})
+
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error_response(None, types.PARSE_ERROR, "Parse error", status_code=400)
+        messages = body if isinstance(body, list) else [body]
+        if not messages or not all(isinstance(message, dict) for message in messages):
+            return _error_response(None, types.INVALID_REQUEST, "Invalid Request", status_code=400)
+
+        session_id = request.headers.get(SESSION_HEADER)
+        session_data = None
+        if not any(_method(message) == "initialize" for message in messages):
+            session_data = (
+                await asyncio.to_thread(self.store.get, session_id) if session_id else None
+            )
+            if session_data is None:
+                # Tells the client to initialize a new session
+                return _error_response(
+                    None, types.INVALID_REQUEST, "Session not found", status_code=404
+                )
+
+        headers = {}
+        responses = []
+        requests = []
+        for message in messages:
+            if _method(message) == "initialize":
+                session_id, session_data, response = await self._initialize(message)
+                headers[SESSION_HEADER] = session_id
+                responses.append(response)
+            elif "id" in message:
+                requests.append(self._handle_request(message, session_data))
+            else:
+                await self._handle_notification(message)
+        # The requests of a batch are independent, so they run concurrently
+        responses.extend(await asyncio.gather(*requests))
+        if not responses:
+            return Response(status_code=202, headers=headers)
+        if len(responses) == 1 and responses[0].get("error", {}).get("code") == SERVER_BUSY:
+            # At capacity: a plain 503 lets load balancers and clients back off
+            headers["retry-after"] = "1"
+            return JSONResponse(responses[0], status_code=503, headers=headers)
+        return JSONResponse(responses if isinstance(body, list) else responses[0], headers=headers)
+
+    async def _initialize(self, message: dict) -> tuple[str, dict, dict]:
+        params = types.InitializeRequestParams.model_validate(message.get("params") or {})
+        options = self.mcp_server.create_initialization_options()
+        capabilities = options.capabilities.model_copy(deep=True)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = False
+        if params.protocolVersion in SUPPORTED_PROTOCOL_VERSIONS:
+            protocol_version = params.protocolVersion
+        else:
+            protocol_version = types.LATEST_PROTOCOL_VERSION
+        session_id = uuid.uuid4().hex
+        session_data = {
+            "session_id": session_id,
+            "client_params": params.model_dump(mode="json", by_alias=True),
+        }
+        await asyncio.to_thread(self.store.put, session_id, session_data)
+        result = types.InitializeResult(
+            protocolVersion=protocol_version,
+            capabilities=capabilities,
+            serverInfo=types.Implementation(
+                name=options.server_name, version=options.server_version
+            ),
+            instructions=options.instructions,
+        )
+        return session_id, session_data, _result(message.get("id"), result)
+
+    async def _handle_request(self, message: dict, session_data: dict) -> dict:
+        request_id = message["id"]
+        request_type = self._request_types.get(message.get("method"))
+        if request_type is None or request_type in UNSUPPORTED_REQUESTS:
+            return _error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+        try:
+            req = request_type.model_validate(message)
+        except pydantic.ValidationError as e:
+            return _error(request_id, types.INVALID_PARAMS, f"Invalid params: {e}")
+        handler = self.mcp_server.request_handlers[request_type]
+
+        client_params = types.InitializeRequestParams.model_validate(
+            session_data["client_params"]
+        )
+        token = request_ctx.set(
+            RequestContext(
+                request_id,
+                req.params.meta if req.params is not None else None,
+                StatelessSession(session_data["session_id"], client_params),
+                self.lifespan_context(),
+            )
+        )
+        try:
+            response = await handler(req)
+        except McpError as e:
+            return _error(request_id, e.error.code, e.error.message)
+        except Exception:
+            # The details stay in the server log, they may describe upstream credentials or hosts
+            logger.exception(f"Error handling {message.get('method')}")
+            return _error(request_id, types.INTERNAL_ERROR, "Internal error")
+        finally:
+            request_ctx.reset(token)
+        return _result(request_id, response.root)
+
+    async def _handle_notification(self, message: dict) -> None:
+        try:
+            notification = types.ClientNotification.model_validate(message).root
+        except pydantic.ValidationError:
+            logger.debug(f"Ignored unknown notification {message.get('method')}")
+            return
+        handler = self.mcp_server.notification_handlers.get(type(notification))
+        if handler is not None:
+            await handler(notification)
+
+
+def _method(message: Any) -> Optional[str]:
+    return message.get("method") if isinstance(message, dict) else None
+
+
+def _result(request_id: Any, result: pydantic.BaseModel) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": result.model_dump(mode="json", by_alias=True, exclude_none=True),
+    }
+
+
+def _error(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _error_response(request_id: Any, code: int, message: str, status_code: int) -> Response:
+    return JSONResponse(_error(request_id, code, message), status_code=status_code)
+
+
+def session_store_from_env() -> SessionStore:
+    """SQLite store at `MCP_SESSION_DB` when set, otherwise sessions stay in memory."""
+    ttl = env_float("MCP_SESSION_TTL_SECONDS", 3600.0)
+    path = env_str("MCP_SESSION_DB")
+    return SqliteSessionStore(path, ttl) if path else MemorySessionStore(ttl)
@@ -0,0 +1,72 @@
+import logging
+import weakref
+from collections import defaultdict
+from typing import Iterable
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.session import ServerSession
+from pydantic import AnyUrl
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceSubscriptions:
+    """Sessions subscribed to `resources/updated` notifications, per resource URI.
+
+    Sessions are held weakly so a closed connection drops out without an explicit unsubscribe.
+    """
+
+    def __init__(self):
+        self._sessions: defaultdict[str, weakref.WeakSet[ServerSession]] = defaultdict(
+            weakref.WeakSet
+        )
+
+    def subscribe(self, uri: str, session: ServerSession) -> None:
+        self._sessions[uri].add(session)
+
+    def unsubscribe(self, uri: str, session: ServerSession) -> None:
+        self._sessions[uri].discard(session)
+
+    async def notify(self, uris: Iterable[str]) -> int:
+        """Send `resources/updated` for each URI to its subscribers and return the count sent."""
+        sent = 0
+        for uri in uris:
+            for session in list(self._sessions.get(uri, ())):
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                    sent += 1
+                except Exception as e:
+                    logger.info(f"Dropping subscriber of {uri}: {e}")
+                    self._sessions[uri].discard(session)
+        return sent
+
+
+def register_resource_subscriptions(mcp: FastMCP) -> None:
+    """Handle resources/subscribe and resources/unsubscribe, and advertise the capability.
+
+    The subscriptions live on the `subscriptions` attribute of the lifespan context.
+    """
+    server = mcp._mcp_server  # noqa: WPS437
+
+    @server.subscribe_resource()
+    async def subscribe(uri: AnyUrl) -> None:
+        request_context = mcp.get_context().request_context
+        request_context.lifespan_context.subscriptions.subscribe(str(uri), request_context.session)
+
+    @server.unsubscribe_resource()
+    async def unsubscribe(uri: AnyUrl) -> None:
+        request_context = mcp.get_context().request_context
+        request_context.lifespan_context.subscriptions.unsubscribe(
+            str(uri), request_context.session
+        )
+
+    # The low-level server always advertises subscribe=False, even with the handlers above
+    get_capabilities = server.get_capabilities
+
+    def get_capabilities_with_subscribe(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+    server.get_capabilities = get_capabilities_with_subscribe